@@ -3,7 +3,8 @@
 """
 Arknights: Endfield -> Discord webhook notifier (Game8).
 - Scrapes active codes from: https://game8.co/games/Arknights-Endfield/archives/571509
-- Posts ONE webhook message per newly discovered active code.
+- Posts newly discovered active codes, batched into as few webhook messages as fit
+  under Discord's 2000-character limit.
 - Optional role ping, but **only once per run** (first successfully posted new-code message).
 - Weekly health ping to a separate summary webhook when there's no new code for >= 7 days.
 
@@ -14,32 +15,115 @@ Env:
   DRY_RUN=true                -> don't post, just print (optional)
 """
 
-import json
+import hashlib
+import heapq
 import os
 import re
 import time
 from pathlib import Path
-from typing import List, Dict, Optional
-from datetime import datetime, timedelta
-from zoneinfo import ZoneInfo
+from typing import List, Dict, Optional, Tuple
+from datetime import datetime
 
+import orjson
 import requests
-from bs4 import BeautifulSoup, Tag
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer, Tag
 
 PAGE_URL = "https://game8.co/games/Arknights-Endfield/archives/571509"
 STATE_PATH = Path("arknights_endfield_codes_state.json")
+# Discord caps messages at 2000 chars; leave room for the header, role mention and link
+MESSAGE_BODY_LIMIT = 1900
+HEALTH_PING_INTERVAL_S = 7 * 24 * 60 * 60
 SESSION = requests.Session()
-SESSION.headers.update({"User-Agent": "arknights-endfield-codes/1.0 (+discord-webhook)"})
+SESSION.headers.update({
+    "User-Agent": "arknights-endfield-codes/1.0 (+discord-webhook)",
+    "Accept": "text/html,application/xhtml+xml",
+    # Includes "br" when brotli is installed, so urllib3 can decode it.
+    "Accept-Encoding": requests.utils.DEFAULT_ACCEPT_ENCODING,
+})
+
+# Only headings and tables are ever inspected; skip building the rest of the page.
+HEADING_TAGS = ["h2", "h3", "h4"]
+PARSE_ONLY = SoupStrainer(HEADING_TAGS + ["table"])
+
+_EXPIRES_RE = re.compile(r"Expires?\s+(\d{1,2}/\d{1,2}/\d{4}|TBA)", re.IGNORECASE)
+_PC_RE = re.compile(r"(PC\s*(Version)?\s*Only|Only\s*(for\s*)?PC(\s*Version)?)", re.IGNORECASE)
+_MOBILE_RE = re.compile(r"(Mobile\s*(Version)?\s*Only|Only\s*(for\s*)?Mobile(\s*Version)?)", re.IGNORECASE)
+_CODE_RE = re.compile(r"\b([A-Z0-9][A-Z0-9\-]{4,19})\b", re.IGNORECASE)
+_DATE_RE = re.compile(r"^\d{1,2}/\d{1,2}/\d{4}$")
+_ACTIVE_HEADING_RE = re.compile(
+    r"<h[234][\s>](?:(?!</h[234]>).)*?active(?:(?!</h[234]>).)*?code",
+    re.IGNORECASE | re.DOTALL,
+)
+_TABLE_TAG_RE = re.compile(r"<(/?)table\b", re.IGNORECASE)
+_SKIP_WORDS = frozenset({
+    "COPY", "COPIED", "REDEEM", "CODES", "CODE", "REWARDS", "EXPIRES",
+    "VERSION", "ONLY", "MOBILE", "TBA", "NONE",
+})
+# Version tags, expiry text, copy-button labels and bullets, stripped in one pass
+_REWARD_CLEAN_RE = re.compile(
+    r"(?:Only for )?(?:PC|Mobile)\s*Version\s*"
+    r"|Expires?\s+(?:\d{1,2}/\d{1,2}/\d{4}|TBA)\s*"
+    r"|\bCopy\b|\bCopied\b"
+    r"|[・•]\s*",
+    re.IGNORECASE,
+)
+_XNUM_RE = re.compile(r"\s+x(\d)")
+
+
+def fetch_html(url: str, state: Optional[Dict] = None) -> Tuple[Optional[str], Dict[str, Optional[str]]]:
+    """
+    Conditional GET using the ETag / Last-Modified saved in state.
+    Returns (html, validators); html is None when the server answers 304 Not Modified.
+    """
+    state = state or {}
+    headers = {}
+    if state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state.get("last_modified"):
+        headers["If-Modified-Since"] = state["last_modified"]
+
+    r = SESSION.get(url, headers=headers, timeout=30)
+    if r.status_code == 304:
+        return None, {}
+    r.raise_for_status()
+    validators = {
+        "etag": r.headers.get("ETag"),
+        "last_modified": r.headers.get("Last-Modified"),
+    }
+    return r.text, validators
 
 
-def fetch_html(url: str) -> str:
-    r = SESSION.get(url, timeout=30)
-    r.raise_for_status()
-    return r.text
+def _make_soup(html: str) -> BeautifulSoup:
+    # lxml is much faster than the pure-Python parser; fall back if it isn't installed.
+    try:
+        return BeautifulSoup(html, "lxml", parse_only=PARSE_ONLY)
+    except FeatureNotFound:
+        return BeautifulSoup(html, "html.parser", parse_only=PARSE_ONLY)
+
+
+def _active_codes_fragment(html: str) -> Optional[str]:
+    """
+    Cheap string scan for the 'Active ... Codes' heading through the close of
+    the first table after it, so the common case parses a few KB instead of
+    the whole page. Nested tables are counted so the slice ends on the outer
+    table's close. Returns None when the markup doesn't look as expected.
+    """
+    m = _ACTIVE_HEADING_RE.search(html)
+    if not m:
+        return None
+    depth = 0
+    for t in _TABLE_TAG_RE.finditer(html, m.end()):
+        depth += -1 if t.group(1) else 1
+        if depth == 0:
+            end = html.find(">", t.end())
+            return html[m.start():end + 1] if end != -1 else None
+        if depth < 0:
+            return None
+    return None
 
 
 def _clean_text(s: str) -> str:
-    return re.sub(r"\s+", " ", (s or "")).strip()
+    return " ".join((s or "").split())
 
 
 def _normalize_code(code: str) -> str:
@@ -61,7 +145,7 @@ def _extract_expiration(text: str) -> Optional[str]:
     - "Expires TBA"
     """
     # Match "Expires" followed by date or TBA
-    match = re.search(r"Expires?\s+(\d{1,2}/\d{1,2}/\d{4}|TBA)", text, re.IGNORECASE)
+    match = _EXPIRES_RE.search(text)
     if match:
         return match.group(1)
     return None
@@ -73,9 +157,9 @@ def _extract_notes(text: str) -> Optional[str]:
     """
     notes = []
     # Match variations: "PC Version Only", "Only for PC Version", "PC Only"
-    if re.search(r"(PC\s*(Version)?\s*Only|Only\s*(for\s*)?PC(\s*Version)?)", text, re.IGNORECASE):
+    if _PC_RE.search(text):
         notes.append("PC Version Only")
-    if re.search(r"(Mobile\s*(Version)?\s*Only|Only\s*(for\s*)?Mobile(\s*Version)?)", text, re.IGNORECASE):
+    if _MOBILE_RE.search(text):
         notes.append("Mobile Version Only")
     return ", ".join(notes) if notes else None
 
@@ -83,25 +167,15 @@ def _extract_notes(text: str) -> Optional[str]:
 def _find_active_codes_section(soup: BeautifulSoup) -> Optional[Tag]:
     """
     Find the heading containing 'Active' and 'Codes', then return the next table.
+    The soup only holds headings and tables, so wrapper divs are already gone;
+    the table only counts if no other heading sits between it and the match.
     """
-    for h in soup.find_all(["h2", "h3", "h4"]):
+    for h in soup.find_all(HEADING_TAGS):
         heading_text = _clean_text(h.get_text(" ")).lower()
         if "active" in heading_text and "code" in heading_text:
-            # Find the next table after this heading
-            p = h
-            while p:
-                p = p.find_next_sibling()
-                if not p:
-                    break
-                if isinstance(p, Tag) and p.name in ("h2", "h3", "h4"):
-                    break
-                if isinstance(p, Tag) and p.name == "table":
-                    return p
-                # Sometimes table is nested in a div
-                if isinstance(p, Tag):
-                    table = p.find("table")
-                    if table:
-                        return table
+            table = h.find_next("table")
+            if table and table.find_previous(HEADING_TAGS) is h:
+                return table
     return None
 
 
@@ -113,44 +187,37 @@ def _extract_code_from_cell(cell: Tag) -> Optional[str]:
     - data-clipboard-text attribute on copy buttons
     - data-code attribute on elements
     """
-    # Game8 specific: look for clipboard input with value attribute
-    for elem in cell.find_all("input", class_="a-clipboard__textInput"):
-        code = elem.get("value", "").strip()
-        if code:
-            return code
-
-    # Also check any input with a value attribute
-    for elem in cell.find_all("input", attrs={"value": True}):
-        code = elem.get("value", "").strip()
-        if code and len(code) >= 5:
-            return code
-
-    # Try data attributes
-    for elem in cell.find_all(attrs={"data-clipboard-text": True}):
-        code = elem.get("data-clipboard-text", "").strip()
-        if code:
-            return code
-
-    for elem in cell.find_all(attrs={"data-code": True}):
-        code = elem.get("data-code", "").strip()
-        if code:
-            return code
+    # Single walk over the cell, remembering the first hit per source so the
+    # priority stays: clipboard input > any input value > data-clipboard-text > data-code
+    input_code = clipboard_code = data_code = None
+    for elem in cell.descendants:
+        if not isinstance(elem, Tag):
+            continue
+        if elem.name == "input":
+            code = elem.get("value", "").strip()
+            if code:
+                # Game8 specific: clipboard input with value attribute
+                if "a-clipboard__textInput" in elem.get("class", ()):
+                    return code
+                if input_code is None and len(code) >= 5:
+                    input_code = code
+        if clipboard_code is None and elem.has_attr("data-clipboard-text"):
+            clipboard_code = elem["data-clipboard-text"].strip() or None
+        if data_code is None and elem.has_attr("data-code"):
+            data_code = elem["data-code"].strip() or None
+
+    code = input_code or clipboard_code or data_code
+    if code:
+        return code
 
     # Fallback: look for code-like patterns in the cell text
     cell_text = cell.get_text(" ")
-    code_pattern = re.compile(r'\b([A-Z0-9][A-Z0-9\-]{4,19})\b', re.IGNORECASE)
-    matches = code_pattern.findall(cell_text)
-
-    skip_words = {
-        "COPY", "COPIED", "REDEEM", "CODES", "CODE", "REWARDS", "EXPIRES",
-        "VERSION", "ONLY", "MOBILE", "TBA", "NONE"
-    }
-
-    for match in matches:
+    for m in _CODE_RE.finditer(cell_text):
+        match = m.group(1)
         upper = match.upper()
-        if upper not in skip_words and not upper.startswith("EXPIRE"):
-            if not re.match(r'^\d{1,2}/\d{1,2}/\d{4}$', match):
-                return match
+        if upper in _SKIP_WORDS or upper.startswith("EXPIRE") or _DATE_RE.match(match):
+            continue
+        return match
 
     return None
 
@@ -169,8 +236,11 @@ def _parse_table(table: Tag) -> List[Dict]:
         if len(cells) < 2:
             continue
 
+        # Row text is reused for header detection and expiration/notes lookup
+        row_text = _clean_text(tr.get_text(" "))
+
         # Check if this is a header row
-        header_text = _clean_text(tr.get_text(" ")).lower()
+        header_text = row_text.lower()
         if "redeem" in header_text and "reward" in header_text:
             continue
         if header_text.startswith("code") or header_text.startswith("redeem code"):
@@ -192,19 +262,12 @@ def _parse_table(table: Tag) -> List[Dict]:
         reward_text = _clean_text(reward_cell.get_text(" "))
 
         # Extract expiration from reward text or look in entire row
-        full_row_text = _clean_text(tr.get_text(" "))
-        expires = _extract_expiration(full_row_text)
-        notes = _extract_notes(full_row_text)
+        expires = _extract_expiration(row_text)
+        notes = _extract_notes(row_text)
 
         # Clean reward text by removing expiration info and common UI text
-        reward_clean = re.sub(r"(Only for )?(PC|Mobile)\s*Version\s*", "", reward_text, flags=re.IGNORECASE)
-        reward_clean = re.sub(r"Expires?\s+(\d{1,2}/\d{1,2}/\d{4}|TBA)\s*", "", reward_clean, flags=re.IGNORECASE)
-        reward_clean = re.sub(r"\bCopy\b|\bCopied\b", "", reward_clean, flags=re.IGNORECASE)
-        reward_clean = _clean_text(reward_clean)
-
-        # Normalize bullet points and formatting
-        reward_clean = re.sub(r"[・•]\s*", "", reward_clean)
-        reward_clean = re.sub(r"\s+x(\d)", r" x\1", reward_clean)
+        reward_clean = _clean_text(_REWARD_CLEAN_RE.sub("", reward_text))
+        reward_clean = _XNUM_RE.sub(r" x\1", reward_clean)
 
         items.append({
             "code": code,
@@ -221,10 +284,15 @@ def extract_codes(html: str) -> List[Dict]:
     Extract codes from Game8's Arknights: Endfield codes page.
     Returns: list of dicts {code, reward, expires, notes, source_line}
     """
-    soup = BeautifulSoup(html, "html.parser")
+    # Try the sliced fragment first; only parse the full page if that misses
+    table = None
+    fragment = _active_codes_fragment(html)
+    if fragment:
+        table = _find_active_codes_section(_make_soup(fragment))
+    if table is None:
+        soup = _make_soup(html)
+        table = _find_active_codes_section(soup)
 
-    # Try to find the active codes table
-    table = _find_active_codes_section(soup)
     if table:
         items = _parse_table(table)
     else:
@@ -260,14 +328,14 @@ def extract_codes(html: str) -> List[Dict]:
 def load_state() -> Dict:
     if STATE_PATH.exists():
         try:
-            return json.loads(STATE_PATH.read_text(encoding="utf-8"))
+            return orjson.loads(STATE_PATH.read_bytes())
         except Exception:
             return {}
     return {}
 
 
 def save_state(state: Dict):
-    STATE_PATH.write_text(json.dumps(state, indent=2, ensure_ascii=False), encoding="utf-8")
+    STATE_PATH.write_bytes(orjson.dumps(state, option=orjson.OPT_INDENT_2))
 
 
 def post_webhook(webhook_url: str, content: str, retries: int = 4) -> Optional[str]:
@@ -287,12 +355,15 @@ def post_webhook(webhook_url: str, content: str, retries: int = 4) -> Optional[s
             r = SESSION.post(
                 f"{webhook_url}?wait=true",
                 headers={"Content-Type": "application/json"},
-                json={"content": content},
+                data=orjson.dumps({"content": content}),
                 timeout=30,
             )
-            if r.status_code in (200, 204):
+            if r.status_code == 204:
+                # No body to parse (shouldn't happen with ?wait=true)
+                return None
+            if r.status_code == 200:
                 try:
-                    return r.json().get("id")
+                    return orjson.loads(r.content).get("id")
                 except Exception:
                     return None
             if r.status_code == 429:
@@ -312,22 +383,54 @@ def post_webhook(webhook_url: str, content: str, retries: int = 4) -> Optional[s
     return None
 
 
-def format_new_code_message(item: Dict, role_mention: Optional[str]) -> str:
-    parts = []
-    if role_mention:
-        parts.append(role_mention)
-    parts.append("**Arknights: Endfield — New Code Found!**")
-    parts.append(f"`{item['code']}`")
+def format_code_block(item: Dict) -> str:
+    parts = [f"`{item['code']}`"]
     if item.get("reward"):
         parts.append(f"**Rewards:** {item['reward']}")
     if item.get("expires"):
         parts.append(f"**Expires:** {item['expires']}")
     if item.get("notes"):
         parts.append(f"**Note:** {item['notes']}")
+    return "\n".join(parts)
+
+
+def format_new_codes_message(blocks: List[str], role_mention: Optional[str]) -> str:
+    parts = []
+    if role_mention:
+        parts.append(role_mention)
+    if len(blocks) == 1:
+        parts.append("**Arknights: Endfield — New Code Found!**")
+    else:
+        parts.append(f"**Arknights: Endfield — {len(blocks)} New Codes Found!**")
+    parts.append("\n\n".join(blocks))
     parts.append(f"<{PAGE_URL}>")
     return "\n".join(parts)
 
 
+def chunk_new_items(items: List[Dict], limit: int = MESSAGE_BODY_LIMIT) -> List[Tuple[List[Dict], List[str]]]:
+    """
+    Group new codes so each message's code blocks stay under `limit` characters.
+    Returns (items, blocks) pairs; the header, mention and source link fit in the remaining headroom.
+    """
+    chunks: List[Tuple[List[Dict], List[str]]] = []
+    cur_items: List[Dict] = []
+    cur_blocks: List[str] = []
+    size = 0
+    for it in items:
+        block = format_code_block(it)
+        added = len(block) + (2 if cur_blocks else 0)
+        if cur_blocks and size + added > limit:
+            chunks.append((cur_items, cur_blocks))
+            cur_items, cur_blocks, size = [], [], 0
+            added = len(block)
+        cur_items.append(it)
+        cur_blocks.append(block)
+        size += added
+    if cur_blocks:
+        chunks.append((cur_items, cur_blocks))
+    return chunks
+
+
 def format_health_message(total_seen: int) -> str:
     return (
         "**Arknights: Endfield scraper health check**\n"
@@ -337,23 +440,32 @@ def format_health_message(total_seen: int) -> str:
     )
 
 
-def should_health_ping(state: Dict, now_sp: datetime) -> bool:
-    """
-    Fire health ping if last ping is >= 7 days ago AND there are no new codes.
-    """
+def _last_health_ping_epoch(state: Dict) -> Optional[float]:
+    epoch = state.get("last_health_ping_epoch")
+    if isinstance(epoch, (int, float)):
+        return float(epoch)
+    # State files written before the epoch field only have the ISO timestamp
     last = state.get("last_health_ping_iso")
     if not last:
-        return True
+        return None
     try:
-        prev = datetime.fromisoformat(last)
+        return datetime.fromisoformat(last).timestamp()
     except Exception:
+        return None
+
+
+def should_health_ping(state: Dict, now: float) -> bool:
+    """
+    Fire health ping if last ping is >= 7 days ago AND there are no new codes.
+    """
+    last = _last_health_ping_epoch(state)
+    if last is None:
         return True
-    return (now_sp - prev) >= timedelta(days=7)
+    return (now - last) >= HEALTH_PING_INTERVAL_S
 
 
 def main():
-    tz = ZoneInfo("America/Sao_Paulo")
-    now_sp = datetime.now(tz)
+    now = time.time()
 
     webhook_codes = (os.getenv("WEBHOOK_URL_CODEX") or "").strip()
     if not webhook_codes:
@@ -363,14 +475,26 @@ def main():
     role_id_env = (os.getenv("ROLE_ID_ARKNIGHTS_ENDFIELD") or "").strip()
     role_mention_template = f"<@&{role_id_env}>" if role_id_env else None
 
-    html = fetch_html(PAGE_URL)
-    items = extract_codes(html)
+    state = load_state()
 
-    print(f"[Info] Found {len(items)} active codes on page.")
-    for it in items:
-        print(f"  - {it['source_line']}")
+    html, validators = fetch_html(PAGE_URL, state)
+    if html is None:
+        # Nothing changed upstream: skip parsing and go straight to the health-ping check.
+        print("[Info] Page not modified since last run (HTTP 304).")
+        items = []
+    else:
+        html_hash = hashlib.blake2b(html.encode("utf-8"), digest_size=16).hexdigest()
+        validators["last_html_hash"] = html_hash
+        if html_hash == state.get("last_html_hash"):
+            # Same bytes as last run (server ignored the conditional headers): nothing new to parse.
+            print("[Info] Page content unchanged since last run.")
+            items = []
+        else:
+            items = extract_codes(html)
+            print(f"[Info] Found {len(items)} active codes on page.")
+            for it in items:
+                print(f"  - {it['source_line']}")
 
-    state = load_state()
     seen_codes = set(state.get("seen_codes", []))
 
     new_items = [it for it in items if it["code"] not in seen_codes]
@@ -378,33 +502,37 @@ def main():
     # ---- Ping-once-per-run control ----
     ping_available = bool(role_mention_template)
 
-    # Announce NEW codes
-    for it in new_items:
+    # Announce NEW codes, packing as many as fit into each message
+    for chunk_items, blocks in chunk_new_items(new_items):
         role_for_this_message = role_mention_template if ping_available else None
-        content = format_new_code_message(it, role_for_this_message)
+        content = format_new_codes_message(blocks, role_for_this_message)
+        codes = ", ".join(it["code"] for it in chunk_items)
         mid = post_webhook(webhook_codes, content)
         if mid:
-            print(f"[OK] Announced new code {it['code']} (message id={mid})")
+            print(f"[OK] Announced new codes {codes} (message id={mid})")
             # Mark that we've used the ping for this run only after a successful send
             if ping_available:
                 ping_available = False
         else:
-            print(f"[WARN] Failed to announce code {it['code']}")
+            print(f"[WARN] Failed to announce codes {codes}")
 
     # Update state if new codes
     if new_items:
-        seen_codes.update(it["code"] for it in new_items)
-        state["seen_codes"] = sorted(seen_codes)
+        # Stored list is kept sorted, so merge in the (already unseen) new codes instead of re-sorting
+        new_codes = sorted({it["code"] for it in new_items})
+        seen_codes.update(new_codes)
+        state["seen_codes"] = list(heapq.merge(state.get("seen_codes", []), new_codes))
         save_state(state)
 
     # Health ping (only if no new codes and weekly cadence)
     if not new_items and webhook_summary:
-        if should_health_ping(state, now_sp):
+        if should_health_ping(state, now):
             msg = format_health_message(total_seen=len(seen_codes))
             mid = post_webhook(webhook_summary, msg)
             if mid:
                 print(f"[OK] Health ping sent (message id={mid})")
-                state["last_health_ping_iso"] = now_sp.isoformat()
+                state["last_health_ping_epoch"] = now
+                state.pop("last_health_ping_iso", None)
                 if os.getenv("DRY_RUN", "false").lower() != "true":
                     save_state(state)
             else:
@@ -413,6 +541,16 @@ def main():
     if not new_items:
         print("[Info] No new codes.")
 
+    # Remember the page validators / content hash so the next run can skip unchanged pages
+    if validators and os.getenv("DRY_RUN", "false").lower() != "true":
+        if any(state.get(k) != v for k, v in validators.items()):
+            for k, v in validators.items():
+                if v:
+                    state[k] = v
+                else:
+                    state.pop(k, None)
+            save_state(state)
+
 
 if __name__ == "__main__":
     main()
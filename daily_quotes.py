@@ -8,6 +8,7 @@ Behavior:
 - 95% chance: choose from regular quotes list
 - 5% chance: choose from mention quotes list, replacing {user} with a random human user mention
 - If mention flow fails (no members, API error), fall back to a regular quote
+- Human user IDs are cached in human_users_cache.json for 7 days to skip member fetches
 
 Required environment variables:
 - DISCORD_BOT_TOKEN: Bot token with permission to post in the target channel
@@ -19,17 +20,33 @@ Optional:
 - DRY_RUN: "true" to log the message without posting
 """
 
+import json
 import logging
 import os
 import random
-from typing import Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional, Tuple
 
 import requests
 import yaml
+from requests.adapters import HTTPAdapter
+
+try:
+    # libyaml-backed loader when PyYAML was built with it; same safe semantics.
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
 
 DISCORD_API_BASE = "https://discord.com/api/v10"
 MENTION_PROBABILITY = 0.05
 PLACEHOLDER = "{user}"
+MEMBER_PAGE_LIMIT = 1000
+MAX_MEMBER_PAGES = 3
+HUMAN_USERS_CACHE_FILE = Path(__file__).parent / "human_users_cache.json"
+# The workflow runs once a day and only ~5% of runs take the mention path, so a day-long TTL
+# would almost always be expired by the next mention; guild membership changes slowly.
+HUMAN_USERS_CACHE_TTL = timedelta(days=7)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -38,10 +55,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger("daily_quotes")
 
+# One keep-alive session for every Discord call (channel lookup, member pages, post).
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=10))
+
 
 def _parse_yaml_list(raw: str, name: str) -> List[str]:
     try:
-        data = yaml.safe_load(raw)
+        data = yaml.load(raw, Loader=SafeLoader)
     except yaml.YAMLError as exc:
         raise ValueError(f"Invalid {name}: {exc}") from exc
     if not isinstance(data, list):
@@ -75,46 +96,108 @@ def bot_headers(bot_token: str) -> dict:
 
 def get_channel_guild_id(channel_id: str, bot_token: str) -> Optional[str]:
     url = f"{DISCORD_API_BASE}/channels/{channel_id}"
-    response = requests.get(url, headers=bot_headers(bot_token), timeout=15)
+    response = SESSION.get(url, headers=bot_headers(bot_token), timeout=15)
     if response.status_code != 200:
         logger.warning("Failed to fetch channel info (%d): %s", response.status_code, response.text[:200])
         return None
     return response.json().get("guild_id")
 
 
-def fetch_guild_members(guild_id: str, bot_token: str) -> List[dict]:
-    members: List[dict] = []
+def _read_human_users_cache(channel_id: str) -> dict:
+    """Raw cache entry for this channel, or an empty dict if missing/unreadable/for another channel."""
+    if not HUMAN_USERS_CACHE_FILE.exists():
+        return {}
+    try:
+        with open(HUMAN_USERS_CACHE_FILE, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("channel_id") != channel_id:
+        return {}
+    return cache
+
+
+def load_human_users_cache(channel_id: str) -> Optional[List[str]]:
+    """Return cached human user IDs for this channel if the cache is still fresh."""
+    cache = _read_human_users_cache(channel_id)
+    try:
+        fetched_at = datetime.fromisoformat(cache["fetched_at"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if datetime.now(timezone.utc) - fetched_at >= HUMAN_USERS_CACHE_TTL:
+        return None
+    user_ids = cache.get("user_ids")
+    return user_ids if isinstance(user_ids, list) and user_ids else None
+
+
+def save_human_users_cache(channel_id: str, user_ids: List[str], guild_id: Optional[str] = None) -> None:
+    """Persist human user IDs so later mention runs skip the member fetch."""
+    cache = {
+        "fetched_at": datetime.now(timezone.utc).isoformat(),
+        "channel_id": channel_id,
+        "guild_id": guild_id,
+        "user_ids": user_ids,
+    }
+    try:
+        with open(HUMAN_USERS_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2)
+    except IOError as exc:
+        logger.warning("Could not save human users cache: %s", exc)
+
+
+def fetch_human_user_ids(
+    guild_id: str,
+    bot_token: str,
+    max_pages: int = MAX_MEMBER_PAGES,
+) -> List[str]:
+    """
+    Page through guild members, keeping human user IDs as batches arrive.
+    Stops after max_pages pages so large guilds cost a bounded number of requests.
+    """
+    humans: List[str] = []
     after: Optional[str] = None
-    while True:
-        params = {"limit": 1000}
+    url = f"{DISCORD_API_BASE}/guilds/{guild_id}/members"
+    for _ in range(max_pages):
+        params = {"limit": MEMBER_PAGE_LIMIT}
         if after:
             params["after"] = after
-        url = f"{DISCORD_API_BASE}/guilds/{guild_id}/members"
-        response = requests.get(url, headers=bot_headers(bot_token), params=params, timeout=20)
+        response = SESSION.get(url, headers=bot_headers(bot_token), params=params, timeout=20)
         if response.status_code != 200:
             logger.warning("Failed to fetch guild members (%d): %s", response.status_code, response.text[:200])
             return []
         batch = response.json()
         if not batch:
             break
-        members.extend(batch)
+        for member in batch:
+            user = member.get("user") or {}
+            uid = user.get("id")
+            if uid and not user.get("bot"):
+                humans.append(uid)
         after = batch[-1]["user"]["id"]
-        if len(batch) < 1000:
+        if len(batch) < MEMBER_PAGE_LIMIT:
             break
-    return members
+    return humans
 
 
-def pick_random_human_user_id(members: Iterable[dict]) -> Optional[str]:
-    humans = []
-    for member in members:
-        user = member.get("user") or {}
-        if not user.get("bot"):
-            uid = user.get("id")
-            if uid:
-                humans.append(uid)
-    if not humans:
-        return None
-    return random.choice(humans)
+def get_human_user_ids(channel_id: str, bot_token: str) -> List[str]:
+    """Human user IDs for the channel's guild, served from the on-disk cache when fresh."""
+    cached = load_human_users_cache(channel_id)
+    if cached is not None:
+        logger.info("Using %d cached human user IDs.", len(cached))
+        return cached
+
+    # A channel never moves guilds, so a stale cache still saves the channel lookup round-trip.
+    guild_id = _read_human_users_cache(channel_id).get("guild_id")
+    if not guild_id:
+        guild_id = get_channel_guild_id(channel_id, bot_token)
+    if not guild_id:
+        logger.info("Could not resolve guild ID for channel %s.", channel_id)
+        return []
+
+    user_ids = fetch_human_user_ids(guild_id, bot_token)
+    if user_ids:
+        save_human_users_cache(channel_id, user_ids, guild_id)
+    return user_ids
 
 
 def build_message(
@@ -127,16 +210,11 @@ def build_message(
     if not use_mention:
         return random.choice(quotes), False
 
-    guild_id = get_channel_guild_id(channel_id, bot_token)
-    if not guild_id:
-        logger.info("Mention path failed: could not resolve guild ID, falling back.")
-        return random.choice(quotes), False
-
-    members = fetch_guild_members(guild_id, bot_token)
-    user_id = pick_random_human_user_id(members)
-    if not user_id:
+    user_ids = get_human_user_ids(channel_id, bot_token)
+    if not user_ids:
         logger.info("Mention path failed: no human users found, falling back.")
         return random.choice(quotes), False
+    user_id = random.choice(user_ids)
 
     template = random.choice(mention_quotes)
     mention = f"<@{user_id}>"
@@ -153,7 +231,7 @@ def post_message(channel_id: str, bot_token: str, content: str, dry_run: bool) -
         return True
 
     url = f"{DISCORD_API_BASE}/channels/{channel_id}/messages"
-    response = requests.post(url, headers=bot_headers(bot_token), json={"content": content}, timeout=15)
+    response = SESSION.post(url, headers=bot_headers(bot_token), json={"content": content}, timeout=15)
     if response.status_code in (200, 201):
         logger.info("Posted daily quote to channel %s", channel_id)
         return True
@@ -3,28 +3,42 @@
 Arknights: Endfield events and banners extractor for Game8.
 """
 
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 import re
-from urllib.parse import urljoin
 from bs4 import BeautifulSoup, Tag
 
+from .parsing import after_subtree, iter_anchors, memoize_extractor, url_joiner
+
 
 # ---------- helpers ----------
 
+_WS_RE = re.compile(r"\s+")
+# Duration keywords/dashes, a year, "MM/DD", or "Mon DD, YYYY" in one scan
+_DURATIONISH_RE = re.compile(
+    r"Duration| to |[–—-]"
+    r"|\b\d{4}\b"
+    r"|\b\d{1,2}/\d{1,2}\b"
+    r"|[A-Za-z]{3,9}\.?\s+\d{1,2},?\s*\d{4}"
+)
+_BAD_HREF_RE = re.compile(r"/login|/register|/signup|/account|site-interface")
+
+_MONTH_PATTERN = r"[A-Za-z]{3,9}\.?\s+\d{1,2}"
+# One scan for any supported range; at a given position the full-date form is tried first:
+#   "Jan 22, 2026 - Feb 7, 2026" | "Jan. 22 - Feb. 7, 2026" | "01/22 - 02/07"
+_DATE_ANY_RE = re.compile(
+    rf"(?P<full>{_MONTH_PATTERN},?\s*\d{{4}}\s*[-–—]\s*{_MONTH_PATTERN},?\s*\d{{4}})"
+    rf"|(?P<month>{_MONTH_PATTERN}\s*[-–—]\s*{_MONTH_PATTERN},?\s*\d{{4}})"
+    r"|(?P<n1>\d{1,2}/\d{1,2})\s*[-–—]\s*(?P<n2>\d{1,2}/\d{1,2})"
+)
+
+
 def _clean(s: str) -> str:
-    import re as _re
-    return _re.sub(r"\s+", " ", (s or "")).strip()
+    return _WS_RE.sub(" ", s or "").strip()
 
 
 def _durationish(s: str) -> bool:
     """Check if a string looks like a date/duration."""
-    s = s or ""
-    return (
-        any(k in s for k in ["Duration", "Event Duration", " to ", "–", "—", "-"])
-        or bool(re.search(r"\b\d{4}\b", s))
-        or bool(re.search(r"\b\d{1,2}/\d{1,2}\b", s))
-        or bool(re.search(r"[A-Za-z]{3,9}\.?\s+\d{1,2},?\s*\d{4}", s))
-    )
+    return _DURATIONISH_RE.search(s or "") is not None
 
 
 def _bad_href(u: str) -> bool:
@@ -33,9 +47,14 @@ def _bad_href(u: str) -> bool:
     ul = u.lower().strip()
     if ul.startswith(("javascript:", "mailto:")) or ul.endswith("#"):
         return True
-    if any(p in ul for p in ["/login", "/register", "/signup", "/account", "site-interface"]):
-        return True
-    return False
+    return _BAD_HREF_RE.search(ul) is not None
+
+
+def _hints_re(hints: Sequence[str]) -> Optional["re.Pattern[str]"]:
+    """Compile substring hints into one alternation (None if there are no hints)."""
+    if not hints:
+        return None
+    return re.compile("|".join(re.escape(h) for h in hints))
 
 
 def _is_header(tag: Tag) -> bool:
@@ -46,11 +65,6 @@ def _header_text(tag: Tag) -> str:
     return _clean(tag.get_text(" ", strip=True)).lower()
 
 
-def _match_header(tag: Tag, hints: List[str]) -> bool:
-    t = _header_text(tag)
-    return any(h in t for h in hints)
-
-
 # Section hints for events
 _CURRENT_EVENTS_HINTS = [
     "current events", "current event", "ongoing events", "ongoing event",
@@ -70,6 +84,24 @@ _UPCOMING_BANNERS_HINTS = [
     "upcoming banners", "upcoming banner", "future banners",
 ]
 
+
+def _sections_re(sections: Dict[str, List[str]]) -> "re.Pattern[str]":
+    """One alternation over every section's hints; the matching group name is the section key."""
+    return re.compile("|".join(
+        f"(?P<{key}>{'|'.join(re.escape(h) for h in hints)})" for key, hints in sections.items()
+    ))
+
+
+_EVENT_SECTIONS_RE = _sections_re({
+    "current": _CURRENT_EVENTS_HINTS,
+    "upcoming": _UPCOMING_EVENTS_HINTS,
+})
+_BANNER_SECTIONS_RE = _sections_re({
+    "current": _CURRENT_BANNERS_HINTS,
+    "next": _NEXT_BANNERS_HINTS,
+    "upcoming": _UPCOMING_BANNERS_HINTS,
+})
+
 # Stop words for section scanning
 _EVENT_STOP_HINTS = [
     "related guides", "comment", "permanent", "history", "all events",
@@ -82,44 +114,61 @@ _BANNER_STOP_HINTS = [
 
 def _extract_date_from_text(text: str) -> Optional[str]:
     """Extract date range from text if present."""
-    # Format: "Jan. 22 - Feb. 7, 2026" or "01/22 - 02/07"
-    month_pattern = r"[A-Za-z]{3,9}\.?\s+\d{1,2}"
-
-    # Full date range with year: "Jan. 22 - Feb. 7, 2026"
-    m = re.search(rf"({month_pattern})\s*[-–—]\s*({month_pattern}),?\s*\d{{4}}", text)
-    if m:
-        return m.group(0)
-
-    # Numeric date range: "01/22 - 02/07"
-    m = re.search(r"(\d{1,2}/\d{1,2})\s*[-–—]\s*(\d{1,2}/\d{1,2})", text)
-    if m:
-        return f"{m.group(1)} - {m.group(2)}"
-
-    # Full date with year range: "Jan 22, 2026 - Feb 7, 2026"
-    m = re.search(rf"({month_pattern},?\s*\d{{4}})\s*[-–—]\s*({month_pattern},?\s*\d{{4}})", text)
-    if m:
-        return m.group(0)
-
-    return None
-
-
-def _collect_events_from_section(head: Tag, base_url: str, stop_hints: List[str], max_items: int = 12) -> List[str]:
-    """Walk from header collecting event links with dates."""
+    m = _DATE_ANY_RE.search(text)
+    if not m:
+        return None
+    if m.group("n1"):
+        return f"{m.group('n1')} - {m.group('n2')}"
+    return m.group(0)
+
+
+def _index_section_heads(headers: List[Tag], sections_re: "re.Pattern[str]") -> Dict[str, Tag]:
+    """Map each section key to the first header mentioning one of its hints, in one scan per header."""
+    heads: Dict[str, Tag] = {}
+    for h in headers:
+        for m in sections_re.finditer(_header_text(h)):
+            heads.setdefault(m.lastgroup, h)
+    return heads
+
+
+def _collect_from_section(
+    head: Tag,
+    base_url: str,
+    stop_hints: List[str],
+    max_items: int = 12,
+    prune_len: int = 80,
+    sibling_section_hints: Sequence[str] = (),
+) -> List[str]:
+    """
+    Walk from header collecting links with dates, deduplicated by (label, href) within the section.
+    `sibling_section_hints` are other section headers (besides the current one) that end the walk.
+    """
     items: List[str] = []
-    seen = set()
-
-    for sib in head.find_all_next():
-        if sib is head:
+    seen: Set[Tuple[str, str]] = set()
+    visited = set()
+    head_text = _header_text(head)
+    abs_url = url_joiner(base_url)
+    stop_re = _hints_re(stop_hints)
+
+    def ends_section(h: Tag) -> bool:
+        t = _header_text(h)
+        if stop_re and stop_re.search(t):
+            return True
+        return t != head_text and any(x in t for x in sibling_section_hints)
+
+    # Document-order walk (same reach as find_all_next, so wrapped headers and lists outside
+    # the header's parent are still seen); once a block is scanned the walk hops past its
+    # subtree instead of re-entering every nested row and cell.
+    el = head.next_element
+    while el is not None:
+        if not isinstance(el, Tag):
+            el = el.next_element
             continue
+        sib = el
 
         # Stop at next major header that looks like a new section
-        if _is_header(sib):
-            t = _header_text(sib)
-            if any(x in t for x in stop_hints + _EVENT_STOP_HINTS):
-                break
-            # Also stop at other known section headers
-            if any(x in t for x in ["upcoming events", "current events"]) and t != _header_text(head):
-                break
+        if _is_header(sib) and ends_section(sib):
+            break
 
         # Scan common containers
         blocks = []
@@ -129,69 +178,17 @@ def _collect_events_from_section(head: Tag, base_url: str, stop_hints: List[str]
             blocks.extend(sib.find_all("tr"))
         elif sib.name in ("div", "p"):
             blocks.append(sib)
-
-        for blk in blocks:
-            for a in blk.find_all("a", href=True):
-                label = _clean(a.get_text(" ", strip=True))
-                if not label or len(label) < 3:
-                    continue
-                href = a.get("href", "")
-                if _bad_href(href):
-                    continue
-
-                abs_href = urljoin(base_url, href)
-                key = (label.lower(), abs_href)
-                if key in seen:
-                    continue
-                seen.add(key)
-
-                # Try to extract date from surrounding text
-                info = None
-                bt = _clean(blk.get_text(" ", strip=True))
-                if bt and len(bt) < 200:
-                    date_str = _extract_date_from_text(bt)
-                    if date_str:
-                        info = date_str
-                    elif _durationish(bt) and bt.lower() != label.lower():
-                        pruned = _clean(bt.replace(label, "")).strip(": -—–")
-                        if pruned and len(pruned) < 80:
-                            info = pruned
-
-                line = f"• [{label}]({abs_href})" + (f" — {info}" if info else "")
-                items.append(line)
-
-                if len(items) >= max_items:
-                    return items
-
-    return items
-
-
-def _collect_banners_from_section(head: Tag, base_url: str, stop_hints: List[str], max_items: int = 12) -> List[str]:
-    """Walk from header collecting banner links with dates."""
-    items: List[str] = []
-    seen = set()
-
-    for sib in head.find_all_next():
-        if sib is head:
+        if not blocks:
+            el = sib.next_element
             continue
-
-        # Stop at next major header that looks like a new section
-        if _is_header(sib):
-            t = _header_text(sib)
-            if any(x in t for x in stop_hints + _BANNER_STOP_HINTS):
-                break
-
-        # Scan common containers
-        blocks = []
-        if sib.name in ("ul", "ol"):
-            blocks.extend(sib.find_all("li", recursive=False))
-        elif sib.name == "table":
-            blocks.extend(sib.find_all("tr"))
-        elif sib.name in ("div", "p"):
-            blocks.append(sib)
+        el = after_subtree(sib)
 
         for blk in blocks:
-            for a in blk.find_all("a", href=True):
+            bt = None  # block text, serialized on first use and shared by the block's anchors
+            for a in iter_anchors(blk):
+                if id(a) in visited:
+                    continue
+                visited.add(id(a))
                 label = _clean(a.get_text(" ", strip=True))
                 if not label or len(label) < 3:
                     continue
@@ -199,7 +196,7 @@ def _collect_banners_from_section(head: Tag, base_url: str, stop_hints: List[str
                 if _bad_href(href):
                     continue
 
-                abs_href = urljoin(base_url, href)
+                abs_href = abs_url(href)
                 key = (label.lower(), abs_href)
                 if key in seen:
                     continue
@@ -207,14 +204,15 @@ def _collect_banners_from_section(head: Tag, base_url: str, stop_hints: List[str
 
                 # Try to extract date from surrounding text
                 info = None
-                bt = _clean(blk.get_text(" ", strip=True))
+                if bt is None:
+                    bt = _clean(blk.get_text(" ", strip=True))
                 if bt and len(bt) < 200:
                     date_str = _extract_date_from_text(bt)
                     if date_str:
                         info = date_str
                     elif _durationish(bt) and bt.lower() != label.lower():
                         pruned = _clean(bt.replace(label, "")).strip(": -—–")
-                        if pruned and len(pruned) < 100:
+                        if pruned and len(pruned) < prune_len:
                             info = pruned
 
                 line = f"• [{label}]({abs_href})" + (f" — {info}" if info else "")
@@ -223,11 +221,16 @@ def _collect_banners_from_section(head: Tag, base_url: str, stop_hints: List[str
                 if len(items) >= max_items:
                     return items
 
+        # a stop header nested inside the block still ends the section once the block is done
+        if any(ends_section(h) for h in sib.find_all(("h2", "h3", "h4"))):
+            break
+
     return items
 
 
 # ---------- main entry points ----------
 
+@memoize_extractor
 def extract_endfield_events(soup: BeautifulSoup, base_url: str) -> List[str]:
     """
     Parse the Game8 Arknights: Endfield events page for:
@@ -242,22 +245,22 @@ def extract_endfield_events(soup: BeautifulSoup, base_url: str) -> List[str]:
         return ["__Arknights: Endfield Events__", "• _No headers found (layout may have changed)._"]
 
     sections = [
-        ("__Current Events__", _CURRENT_EVENTS_HINTS, ["upcoming"]),
-        ("__Upcoming Events__", _UPCOMING_EVENTS_HINTS, ["current"]),
+        ("__Current Events__", "current", ["upcoming"]),
+        ("__Upcoming Events__", "upcoming", ["current"]),
     ]
 
-    for title, hints, stop_on in sections:
-        head = next((h for h in headers if _match_header(h, hints)), None)
+    section_heads = _index_section_heads(headers, _EVENT_SECTIONS_RE)
+    for title, section, stop_on in sections:
+        head = section_heads.get(section)
         if not head:
             continue
-        rows = _collect_events_from_section(head, base_url, stop_on)
+        rows = _collect_from_section(
+            head, base_url, stop_on + _EVENT_STOP_HINTS,
+            sibling_section_hints=("upcoming events", "current events"),
+        )
         if rows:
             bullets.append(title)
-            seen = set()
-            for r in rows:
-                if r not in seen:
-                    bullets.append(r)
-                    seen.add(r)
+            bullets.extend(rows)
 
     if not bullets:
         bullets = ["__Arknights: Endfield Events__", "• _No parseable events found (layout may have changed)._"]
@@ -265,6 +268,7 @@ def extract_endfield_events(soup: BeautifulSoup, base_url: str) -> List[str]:
     return bullets
 
 
+@memoize_extractor
 def extract_endfield_gachas(soup: BeautifulSoup, base_url: str) -> List[str]:
     """
     Parse the Game8 Arknights: Endfield banner schedule page for:
@@ -280,23 +284,20 @@ def extract_endfield_gachas(soup: BeautifulSoup, base_url: str) -> List[str]:
         return ["__Arknights: Endfield Banners__", "• _No headers found (layout may have changed)._"]
 
     sections = [
-        ("__Current Banners__", _CURRENT_BANNERS_HINTS, ["next", "upcoming"]),
-        ("__Next Banners__", _NEXT_BANNERS_HINTS, ["current", "upcoming"]),
-        ("__Upcoming Banners__", _UPCOMING_BANNERS_HINTS, ["current", "next"]),
+        ("__Current Banners__", "current", ["next", "upcoming"]),
+        ("__Next Banners__", "next", ["current", "upcoming"]),
+        ("__Upcoming Banners__", "upcoming", ["current", "next"]),
     ]
 
-    for title, hints, stop_on in sections:
-        head = next((h for h in headers if _match_header(h, hints)), None)
+    section_heads = _index_section_heads(headers, _BANNER_SECTIONS_RE)
+    for title, section, stop_on in sections:
+        head = section_heads.get(section)
         if not head:
             continue
-        rows = _collect_banners_from_section(head, base_url, stop_on)
+        rows = _collect_from_section(head, base_url, stop_on + _BANNER_STOP_HINTS, prune_len=100)
         if rows:
             bullets.append(title)
-            seen = set()
-            for r in rows:
-                if r not in seen:
-                    bullets.append(r)
-                    seen.add(r)
+            bullets.extend(rows)
 
     if not bullets:
         bullets = ["__Arknights: Endfield Banners__", "• _No parseable banners found (layout may have changed)._"]
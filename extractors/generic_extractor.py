@@ -4,15 +4,20 @@ from typing import List, Optional
 from urllib.parse import urljoin
 from bs4 import BeautifulSoup, Tag
 
+from .parsing import iter_anchors, memoize_extractor
+
 # Local helpers (kept self-contained)
 
+_WS_RE = re.compile(r"\s+")
+_DURATIONISH_RE = re.compile(r"Duration|期間|to |[–—-]|\b\d{4}\b")
+_BAD_HREF_RE = re.compile(r"/login|/register|/signup|/account")
+
 def _clean(s: str) -> str:
-    import re as _re
-    s = _re.sub(r"\s+", " ", s).strip()
+    s = _WS_RE.sub(" ", s).strip()
     return s.replace("**", "").replace("__", "").replace("`", "")
 
 def _durationish(s: str) -> bool:
-    return any(k in s for k in ["Duration", "Event Duration", "期間", "to ", "–", "—", "-"]) or bool(re.search(r"\b\d{4}\b", s))
+    return _DURATIONISH_RE.search(s) is not None
 
 def _anchor_text(a: Tag) -> str:
     return _clean(a.get_text(" ", strip=True))
@@ -23,9 +28,7 @@ def _bad_href(u: str) -> bool:
     ul = u.lower().strip()
     if ul.startswith("javascript:") or ul.startswith("mailto:") or ul.endswith("#"):
         return True
-    if any(p in ul for p in ["/login", "/register", "/signup", "/account"]):
-        return True
-    return False
+    return _BAD_HREF_RE.search(ul) is not None
 
 def _collect_items_near_head(head: Tag, base_url: str, max_items: int = 12) -> List[str]:
     items: List[str] = []
@@ -46,7 +49,7 @@ def _collect_items_near_head(head: Tag, base_url: str, max_items: int = 12) -> L
             candidate_blocks.append(sib)
 
         for block in candidate_blocks:
-            a = block.find("a", href=True)
+            a = next(iter_anchors(block), None)
             if not a:
                 continue
             href = a.get("href", "")
@@ -97,6 +100,7 @@ def _collect_items_near_head(head: Tag, base_url: str, max_items: int = 12) -> L
 
 # --- Public API ---
 
+@memoize_extractor
 def extract_events_with_links_generic(soup: BeautifulSoup, base_url: str) -> List[str]:
     headings = soup.find_all(["h2", "h3", "h4"])
     key_heads = [h for h in headings if any(
@@ -112,7 +116,8 @@ def extract_events_with_links_generic(soup: BeautifulSoup, base_url: str) -> Lis
             bullets.extend(_collect_items_near_head(head, base_url, max_items=10))
     else:
         seen = set()
-        for a in soup.find_all("a", href=True):
+        # Lazy walk: the 12-bullet break below ends the scan without building the full anchor list
+        for a in iter_anchors(soup):
             href = a.get("href", "")
             if _bad_href(href):
                 continue
@@ -135,10 +140,5 @@ def extract_events_with_links_generic(soup: BeautifulSoup, base_url: str) -> Lis
             if len(bullets) >= 12:
                 break
 
-    final: List[str] = []
-    seen_line = set()
-    for b in bullets:
-        if b not in seen_line:
-            final.append(b)
-            seen_line.add(b)
-    return final[:40]
+    # Order-preserving dedup
+    return list(dict.fromkeys(bullets))[:40]
@@ -1,15 +1,20 @@
 # -*- coding: utf-8 -*-
 import re
-from typing import List, Optional
+from itertools import islice
+from typing import Dict, List, Optional
 from urllib.parse import urljoin
 
 from bs4 import BeautifulSoup, Tag
 
+from .parsing import following_tags, inside, iter_anchors, memoize_extractor
+
 # --- Local helpers ---
 
+_WS_RE = re.compile(r"\s+")
+_YEAR_RE = re.compile(r"\b\d{4}\b")
+
 def _clean(s: str) -> str:
-    import re as _re
-    s = _re.sub(r"\s+", " ", s).strip()
+    s = _WS_RE.sub(" ", s).strip()
     return s.replace("**", "").replace("__", "").replace("`", "")
 
 _SKIP_TEXT_PATTERNS = [
@@ -22,42 +27,57 @@ _SKIP_TEXT_PATTERNS = [
     "game tools",
 ]
 
+_JUNK_RE = re.compile("|".join(re.escape(p) for p in _SKIP_TEXT_PATTERNS), re.I)
+_BAD_GENSHIN_URL_RE = re.compile(r"/account|/login|/register|/tools|site-interface")
+
 def _is_junk_text(s: str) -> bool:
-    s_low = s.lower()
-    return any(p in s_low for p in _SKIP_TEXT_PATTERNS)
+    return _JUNK_RE.search(s) is not None
 
 def _is_good_genshin_url(u: str) -> bool:
     u = u.lower()
     if "genshin-impact" not in u:
         return False
-    if any(x in u for x in ["/account", "/login", "/register", "/tools", "site-interface"]):
-        return False
-    return True
+    return _BAD_GENSHIN_URL_RE.search(u) is None
+
+def _tag_text(tag: Tag, cache: Optional[Dict[int, str]] = None) -> str:
+    """_clean(tag text), memoized per tag in `cache` (keyed by id; only valid while the soup is alive)."""
+    if cache is None:
+        return _clean(tag.get_text(" ", strip=True))
+    key = id(tag)
+    txt = cache.get(key)
+    if txt is None:
+        txt = cache[key] = _clean(tag.get_text(" ", strip=True))
+    return txt
 
-def _find_section_roots(soup: BeautifulSoup, titles: List[str]) -> List[Tag]:
+
+def _find_section_roots(soup: BeautifulSoup, titles: List[str], cache: Optional[Dict[int, str]] = None) -> List[Tag]:
     roots = []
-    tlow = [t.lower() for t in titles]
+    tlow = frozenset(t.lower() for t in titles)
     for h in soup.find_all(["h2", "h3"]):
-        txt = _clean(h.get_text(" ", strip=True)).lower()
+        txt = _tag_text(h, cache).lower()
         if txt in tlow:
             roots.append(h)
     if roots:
         return roots
     for a in soup.find_all("a"):
-        txt = _clean(a.get_text(" ", strip=True)).lower()
+        txt = _tag_text(a, cache).lower()
         if txt in tlow:
             roots.append(a)
     return roots
 
-def _find_nearby_link_for_event(head: Tag, base_url: str) -> Optional[str]:
-    name = _clean(head.get_text(" ", strip=True)).lower()
-    for sib in head.find_all_next(limit=40):
-        if sib is head:
-            continue
+def _find_nearby_link_for_event(head: Tag, base_url: str, cache: Optional[Dict[int, str]] = None) -> Optional[str]:
+    name = _tag_text(head, cache).lower()
+    scanned: Optional[Tag] = None
+    for sib in islice(following_tags(head), 40):
         if sib.name == "h3":  # next event block starts
             break
-        for a in sib.find_all("a", href=True):
-            label = _clean(a.get_text(" ", strip=True)).lower()
+        if scanned is not None:
+            if inside(sib, scanned):
+                continue
+            scanned = None
+        scanned = sib
+        for a in iter_anchors(sib):
+            label = _tag_text(a, cache).lower()
             href = urljoin(base_url, a["href"])
             if not _is_good_genshin_url(href):
                 continue
@@ -66,10 +86,18 @@ def _find_nearby_link_for_event(head: Tag, base_url: str) -> Optional[str]:
     return None
 
 _DATE_WORD = r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2},\s*\d{4}"
-_DATE_RANGE = re.compile(r"(\d{1,2}/\d{1,2})\s*[-–—]\s*(\d{1,2}/\d{1,2})", re.I)
-_DATE_LINE = re.compile(r"(event start|event end)[:\s]*(" + _DATE_WORD + ")", re.I)
+# Either a compact "MM/DD - MM/DD" range or an "Event Start/End: <date>" line, in one scan
+_DATE_ANY = re.compile(
+    r"(?P<r1>\d{1,2}/\d{1,2})\s*[-–—]\s*(?P<r2>\d{1,2}/\d{1,2})"
+    r"|(?P<kind>event start|event end)[:\s]*(?P<date>" + _DATE_WORD + ")",
+    re.I,
+)
+
+# Event-list H3s that are navigation or version recaps rather than events
+# ("version" and "event" may appear in either order)
+_H3_SKIP_RE = re.compile(r"events calendar|new archives|upcoming archives|version.*event|event.*version")
 
-def _collect_dates_after(head: Tag) -> Optional[str]:
+def _collect_dates_after(head: Tag, cache: Optional[Dict[int, str]] = None) -> Optional[str]:
     start = end = None
     compact = None
     for sib in head.find_all_next(limit=20):
@@ -77,25 +105,24 @@ def _collect_dates_after(head: Tag) -> Optional[str]:
             continue
         if sib.name == "h3":
             break
-        t = _clean(sib.get_text(" ", strip=True))
+        t = _tag_text(sib, cache)
         if not t:
             continue
+        # both _DATE_ANY branches need a "/" or the word "event"; most blocks have neither
+        if "/" not in t and "event" not in t.lower():
+            continue
         if _is_junk_text(t):
             continue
-        m = _DATE_RANGE.search(t)
-        if m:
-            compact = f"{m.group(1)} - {m.group(2)}"
-            break
-        for part in t.split(" / "):
-            m2 = _DATE_LINE.search(part)
-            if m2:
-                kind = m2.group(1).lower()
-                date_str = m2.group(2)
-                if "start" in kind and not start:
-                    start = date_str
-                elif "end" in kind and not end:
-                    end = date_str
-        if start and end:
+        for m in _DATE_ANY.finditer(t):
+            if m.group("r1"):
+                compact = f"{m.group('r1')} - {m.group('r2')}"
+                break
+            kind = m.group("kind").lower()
+            if "start" in kind and not start:
+                start = m.group("date")
+            elif "end" in kind and not end:
+                end = m.group("date")
+        if compact or (start and end):
             break
 
     if compact:
@@ -106,9 +133,13 @@ def _collect_dates_after(head: Tag) -> Optional[str]:
 
 # --- Public API ---
 
+@memoize_extractor
 def extract_genshin_events(soup: BeautifulSoup, base_url: str) -> List[str]:
     SECTION_TITLES = ["List of Current Events", "List of Upcoming Events"]
-    section_roots = _find_section_roots(soup, SECTION_TITLES)
+    section_titles_low = frozenset(t.lower() for t in SECTION_TITLES)
+    # Headers and anchors are re-read by several helpers below; serialize each one once
+    text_cache: Dict[int, str] = {}
+    section_roots = _find_section_roots(soup, SECTION_TITLES, text_cache)
     if not section_roots:
         return []  # fall back to generic
 
@@ -118,29 +149,26 @@ def extract_genshin_events(soup: BeautifulSoup, base_url: str) -> List[str]:
     def is_section_title(tag: Tag) -> bool:
         if not hasattr(tag, "get_text"):
             return False
-        txt = _clean(tag.get_text(" ", strip=True)).lower()
-        return txt in {t.lower() for t in SECTION_TITLES}
+        txt = _tag_text(tag, text_cache).lower()
+        return txt in section_titles_low
 
     for root in section_roots:
         for sib in root.next_siblings:
-            from bs4 import Tag as _Tag
-            if not isinstance(sib, _Tag):
+            if not isinstance(sib, Tag):
                 continue
             if sib.name in ("h2", "h3") and is_section_title(sib) and sib is not root:
                 break
             if sib.name == "h3":
-                txt = _clean(sib.get_text(" ", strip=True))
+                txt = _tag_text(sib, text_cache)
                 low = txt.lower()
-                if any(k in low for k in ["events calendar", "new archives", "upcoming archives"]):
-                    continue
-                if "version" in low and "event" in low:
+                if _H3_SKIP_RE.search(low):
                     continue
                 if _is_junk_text(low) or len(txt.split()) < 2:
                     continue
-                link = _find_nearby_link_for_event(sib, base_url)
+                link = _find_nearby_link_for_event(sib, base_url, text_cache)
                 if link and not _is_good_genshin_url(link):
                     link = None
-                dates = _collect_dates_after(sib)
+                dates = _collect_dates_after(sib, text_cache)
                 key = (low, link or "")
                 if key in seen:
                     continue
@@ -156,18 +184,16 @@ def extract_genshin_events(soup: BeautifulSoup, base_url: str) -> List[str]:
                 if len(bullets) >= 14:
                     return bullets
             for h in sib.find_all("h3"):
-                txt = _clean(h.get_text(" ", strip=True))
+                txt = _tag_text(h, text_cache)
                 low = txt.lower()
-                if any(k in low for k in ["events calendar", "new archives", "upcoming archives"]):
-                    continue
-                if "version" in low and "event" in low:
+                if _H3_SKIP_RE.search(low):
                     continue
                 if _is_junk_text(low) or len(txt.split()) < 2:
                     continue
-                link = _find_nearby_link_for_event(h, base_url)
+                link = _find_nearby_link_for_event(h, base_url, text_cache)
                 if link and not _is_good_genshin_url(link):
                     link = None
-                dates = _collect_dates_after(h)
+                dates = _collect_dates_after(h, text_cache)
                 key = (low, link or "")
                 if key in seen:
                     continue
@@ -204,6 +230,7 @@ def _find_gacha_section_root(soup: BeautifulSoup) -> Optional[Tag]:
             return h
     return None
 
+@memoize_extractor
 def extract_genshin_gachas(soup: BeautifulSoup, base_url: str) -> List[str]:
     """
     Parse "List of Current Event Banners" (formerly "Gachas") on the main hub page.
@@ -216,10 +243,13 @@ def extract_genshin_gachas(soup: BeautifulSoup, base_url: str) -> List[str]:
 
     seen = set()
     count = 0
+    text_cache: Dict[int, str] = {}
 
     # Stop hints - headers that indicate we've left the banner section
     stop_hints = ["permanent banner", "standard banner", "related guides", "beginner", "comment"]
 
+    # last container whose anchors were scanned; its descendants are skipped below
+    scanned: Optional[Tag] = None
     for sib in root.find_all_next(limit=150):
         if sib is root:
             continue
@@ -229,13 +259,18 @@ def extract_genshin_gachas(soup: BeautifulSoup, base_url: str) -> List[str]:
             if any(h in txt for h in stop_hints):
                 break
 
+        if scanned is not None:
+            if inside(sib, scanned):
+                continue
+            scanned = None
+
         # Handle table rows (new layout uses tables)
         if sib.name == "table":
             for row in sib.find_all("tr"):
                 cells = row.find_all(["td", "th"])
                 if not cells:
                     continue
-                for a in row.find_all("a", href=True):
+                for a in iter_anchors(row):
                     label = _clean(a.get_text(" ", strip=True))
                     if not label or len(label) < 2:
                         continue
@@ -251,7 +286,7 @@ def extract_genshin_gachas(soup: BeautifulSoup, base_url: str) -> List[str]:
                     row_text = _clean(row.get_text(" ", strip=True))
                     if len(row_text) < 200:
                         # Look for date patterns in the row
-                        if (" - " in row_text) or ("–" in row_text) or ("—" in row_text) or re.search(r"\b\d{4}\b", row_text):
+                        if (" - " in row_text) or ("–" in row_text) or ("—" in row_text) or _YEAR_RE.search(row_text):
                             pruned = _clean(row_text.replace(label, "")).strip(": -—–")
                             if pruned and len(pruned) > 3:
                                 info = pruned
@@ -264,7 +299,8 @@ def extract_genshin_gachas(soup: BeautifulSoup, base_url: str) -> List[str]:
             continue
 
         # Handle other containers (lists, divs, etc.)
-        for a in getattr(sib, "find_all", lambda *a, **k: [])("a", href=True):
+        scanned = sib
+        for a in iter_anchors(sib):
             label = _clean(a.get_text(" ", strip=True))
             if not label or len(label) < 2:
                 continue
@@ -279,8 +315,8 @@ def extract_genshin_gachas(soup: BeautifulSoup, base_url: str) -> List[str]:
             info = None
             parent = a.find_parent(["li", "tr", "p", "div"])
             if parent:
-                txt = _clean(parent.get_text(" ", strip=True))
-                if len(txt) < 180 and ((" - " in txt) or ("–" in txt) or ("—" in txt) or (" to " in txt.lower()) or re.search(r"\b\d{4}\b", txt)):
+                txt = _tag_text(parent, text_cache)
+                if len(txt) < 180 and ((" - " in txt) or ("–" in txt) or ("—" in txt) or (" to " in txt.lower()) or _YEAR_RE.search(txt)):
                     if len(txt) > len(label)+3:
                         info = _clean(txt.replace(label, "")).strip(": -—–")
             bullets.append(f"• [{label}]({href})" + (f" — {info}" if info else ""))
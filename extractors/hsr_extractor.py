@@ -4,11 +4,22 @@ import re
 from urllib.parse import urljoin
 from bs4 import BeautifulSoup, Tag
 
+from .parsing import after_subtree, memoize_extractor
+
 # ---------- helpers ----------
 
+_WS_RE = re.compile(r"\s+")
+# year | "09/23/2025" | "Sep. 23, 2025" in a single pass
+_DURATION_RE = re.compile(r"\b\d{4}\b|\b\d{1,2}/\d{1,2}/\d{2,4}\b|[A-Za-z]{3,9}\.? \d{1,2}, ?\d{4}")
+_DURATION_KEYWORDS = ("Duration", " to ", "–", "—", "-")
+# formats like "Sep. 23, 2025 - Oct. 15, 2025" or "09/23 - 10/15/2025"
+_INFO_DATE_RE = re.compile(
+    r"([A-Za-z]{3,9}\.? \d{1,2}, ?\d{4}.*?\d{4}|\d{1,2}/\d{1,2} ?- ?\d{1,2}/\d{1,2}/\d{2,4}|\d{1,2}/\d{1,2}/\d{2,4})"
+)
+_VERSION_TAG_RE = re.compile(r"\s*\(ver\.?\s*[\d.]+[^)]*\)", re.I)
+
 def _clean(s: str) -> str:
-    import re as _re
-    return _re.sub(r"\s+", " ", (s or "")).strip()
+    return _WS_RE.sub(" ", s or "").strip()
 
 
 def _normalize_banner_name(label: str) -> str:
@@ -23,18 +34,13 @@ def _normalize_banner_name(label: str) -> str:
         if name.endswith(suffix):
             name = name[:-len(suffix)]
     # Remove version tags like "(ver. 3.8 phase 3)" or "(Ver 3.8)"
-    name = re.sub(r"\s*\(ver\.?\s*[\d.]+[^)]*\)", "", name, flags=re.I)
+    name = _VERSION_TAG_RE.sub("", name)
     return name.strip()
 
 def _durationish(s: str) -> bool:
     s = s or ""
     # catches ranges like "Sep. 23, 2025 - Oct. 15, 2025", "09/23 - 10/15/2025", "to", dashes, and years
-    return (
-            any(k in s for k in ["Duration", "Event Duration", " to ", "–", "—", "-"])
-            or bool(re.search(r"\b\d{4}\b", s))
-            or bool(re.search(r"\b\d{1,2}/\d{1,2}/\d{2,4}\b", s))
-            or bool(re.search(r"[A-Za-z]{3,9}\.? \d{1,2}, ?\d{4}", s))
-    )
+    return any(k in s for k in _DURATION_KEYWORDS) or _DURATION_RE.search(s) is not None
 
 def _is_header(tag: Tag) -> bool:
     return getattr(tag, "name", "").lower() in {"h2", "h3", "h4"}
@@ -53,9 +59,23 @@ _UPCOMING_HINTS = [
     "upcoming warp banners", "upcoming banners", "upcoming warps", "upcoming",
 ]
 
-def _match_header(tag: Tag, hints: list[str]) -> bool:
-    t = _header_text(tag)
-    return any(h in t for h in hints)
+def _minimal_hints(hints: List[str]) -> tuple:
+    """Drop hints that contain a shorter hint; `any(h in text ...)` matches the same headers."""
+    return tuple(h for h in hints if not any(o != h and o in h for o in hints))
+
+_CURRENT_MATCH = _minimal_hints(_CURRENT_HINTS)
+_NEXT_MATCH = _minimal_hints(_NEXT_HINTS)
+_UPCOMING_MATCH = _minimal_hints(_UPCOMING_HINTS)
+_SECTION_STOP_EXTRA = ("related guides", "all warp (gacha) simulators", "permanent", "history")
+
+# Banner-ish anchor labels, plus named characters listed under "Next Banner Information"
+_BANNER_LABEL_KEYWORDS = ["banner", "light cone", "brilliant fixation", "bygone reminiscence", "warp"]
+_BANNER_LABEL_NAMES = ["evernight", "herta", "permansor", "anaxa", "saber", "archer", "silver wolf", "kafka", "cerydra"]
+_BANNER_LABEL_RE = re.compile("|".join(map(re.escape, _BANNER_LABEL_KEYWORDS + _BANNER_LABEL_NAMES)))
+
+def _match_header(text: str, hints: tuple) -> bool:
+    """`text` is the header's precomputed _header_text."""
+    return any(h in text for h in hints)
 
 def _block_text_without_link(blk: Tag, label: str) -> Optional[str]:
     bt = _clean(blk.get_text(" ", strip=True))
@@ -67,6 +87,16 @@ def _block_text_without_link(blk: Tag, label: str) -> Optional[str]:
     pruned = _clean(bt.replace(label, "")).strip(": -—–")
     return pruned or None
 
+def _table_rows(table: Tag) -> List[Tag]:
+    """Rows of `table` itself (direct or under thead/tbody/tfoot); nested tables stay part of their cell's row."""
+    rows: List[Tag] = []
+    for child in table.find_all(["tr", "thead", "tbody", "tfoot"], recursive=False):
+        if child.name == "tr":
+            rows.append(child)
+        else:
+            rows.extend(child.find_all("tr", recursive=False))
+    return rows
+
 def _collect_links_from_section(head: Tag, base_url: str, stop_on: list[str], max_items: int = 14) -> List[str]:
     """Walk forward from header, collecting banner-ish links + nearby date/info text.
 
@@ -76,15 +106,25 @@ def _collect_links_from_section(head: Tag, base_url: str, stop_on: list[str], ma
     # Collect all potential entries first, then dedupe
     raw_entries: List[Dict] = []
     seen_exact = set()
-
-    for sib in head.find_all_next():
-        if sib is head:
+    # local aliases for the hot loop
+    seen_exact_add = seen_exact.add
+    raw_entries_append = raw_entries.append
+    stop_hints = _minimal_hints(list(stop_on) + list(_SECTION_STOP_EXTRA))
+
+    # Document-order walk bounded by the section, not by a tag count: once a list/table/div
+    # block has been scanned the walk hops past its subtree, so a long banner table costs
+    # one step instead of one per nested row, cell and image.
+    el = head.next_element
+    while el is not None:
+        if not isinstance(el, Tag):
+            el = el.next_element
             continue
+        sib = el
 
         # stop at next major header that looks like a new section
         if _is_header(sib):
             t = _header_text(sib)
-            if any(x in t for x in stop_on + ["related guides", "all warp (gacha) simulators", "permanent", "history"]):
+            if any(x in t for x in stop_hints):
                 break
 
         # scan common containers
@@ -92,9 +132,13 @@ def _collect_links_from_section(head: Tag, base_url: str, stop_on: list[str], ma
         if sib.name in ("ul", "ol"):
             blocks.extend(sib.find_all("li", recursive=False))
         elif sib.name == "table":
-            blocks.extend(sib.find_all("tr"))
+            blocks.extend(_table_rows(sib))
         elif sib.name in ("div", "p"):
             blocks.append(sib)
+        if not blocks:
+            el = sib.next_element
+            continue
+        el = after_subtree(sib)
 
         for blk in blocks:
             a_tags = blk.find_all("a", href=True)
@@ -107,31 +151,32 @@ def _collect_links_from_section(head: Tag, base_url: str, stop_on: list[str], ma
                     continue
                 # keep it banner-focused
                 low = label.lower()
-                if not any(k in low for k in ["banner", "light cone", "brilliant fixation", "bygone reminiscence", "warp"]):
-                    # allow named characters in "Next Banner Information"
-                    if not any(k in low for k in ["evernight", "herta", "permansor", "anaxa", "saber", "archer", "silver wolf", "kafka", "cerydra"]):
-                        continue
+                if not _BANNER_LABEL_RE.search(low):
+                    continue
 
                 href = urljoin(base_url, a["href"])
-                exact_key = (label.lower(), href)
+                exact_key = (low, href)
                 if exact_key in seen_exact:
                     continue
-                seen_exact.add(exact_key)
+                seen_exact_add(exact_key)
 
                 info = _block_text_without_link(blk, label)
                 if info and not _durationish(info):
                     # try to find a nearby date within the same block text
-                    # formats like "Sep. 23, 2025 - Oct. 15, 2025" or "09/23 - 10/15/2025"
-                    m = re.search(r"([A-Za-z]{3,9}\.? \d{1,2}, ?\d{4}.*?\d{4}|\d{1,2}/\d{1,2} ?- ?\d{1,2}/\d{1,2}/\d{2,4}|\d{1,2}/\d{1,2}/\d{2,4})", info)
+                    m = _INFO_DATE_RE.search(info)
                     info = m.group(0) if m else info
 
-                raw_entries.append({
+                raw_entries_append({
                     "label": label,
                     "href": href,
                     "info": info if info and _durationish(info) else None,
                     "normalized": _normalize_banner_name(label),
                 })
 
+        # a stop header nested inside the block still ends the section once the block is done
+        if any(any(x in _header_text(h) for x in stop_hints) for h in sib.find_all(("h2", "h3", "h4"))):
+            break
+
     # Deduplicate by normalized name, keeping the entry with the most info
     by_normalized: Dict[str, Dict] = {}
     for entry in raw_entries:
@@ -164,6 +209,7 @@ def _collect_links_from_section(head: Tag, base_url: str, stop_on: list[str], ma
 
 # ---------- main entry ----------
 
+@memoize_extractor
 def extract_hsr_gachas(soup: BeautifulSoup, base_url: str) -> List[str]:
     """
     Parses the Game8 'All Current and Upcoming Warp Banners Schedule' page for:
@@ -177,16 +223,18 @@ def extract_hsr_gachas(soup: BeautifulSoup, base_url: str) -> List[str]:
     headers = list(soup.find_all(["h2", "h3", "h4"]))
     if not headers:
         return ["__Honkai: Star Rail Banners__", "• _No headers found (layout may have changed)._"]
+    # get_text walks every descendant string; do it once per header, not once per section
+    headers_txt = [(h, _header_text(h)) for h in headers]
 
     # sections we’ll try to pull (in this order)
     sections = [
-        ("__Current Warp Banners__", _CURRENT_HINTS, ["next", "upcoming"]),
-        ("__Next Banners__", _NEXT_HINTS, ["upcoming", "current", "light cone banners", "countdown"]),
-        ("__Upcoming Warp Banners__", _UPCOMING_HINTS, ["current", "next"]),
+        ("__Current Warp Banners__", _CURRENT_MATCH, ["next", "upcoming"]),
+        ("__Next Banners__", _NEXT_MATCH, ["upcoming", "current", "light cone banners", "countdown"]),
+        ("__Upcoming Warp Banners__", _UPCOMING_MATCH, ["current", "next"]),
     ]
 
     for title, hints, stop_on in sections:
-        head = next((h for h in headers if _match_header(h, hints)), None)
+        head = next((h for h, t in headers_txt if _match_header(t, hints)), None)
         if not head:
             continue
         rows = _collect_links_from_section(head, base_url, stop_on=stop_on)
@@ -209,6 +257,8 @@ def extract_hsr_gachas(soup: BeautifulSoup, base_url: str) -> List[str]:
 
 _HSR_CURRENT_EVENTS_HINTS = ["honkai: star rail current events", "current events"]
 _HSR_UPCOMING_EVENTS_HINTS = ["upcoming event schedule", "upcoming events"]
+_HSR_CURRENT_EVENTS_MATCH = _minimal_hints(_HSR_CURRENT_EVENTS_HINTS)
+_HSR_UPCOMING_EVENTS_MATCH = _minimal_hints(_HSR_UPCOMING_EVENTS_HINTS)
 _HSR_SKIP_H3_PATTERN = re.compile(r"\d+\.\d+|schedule$|^star rail \d", re.I)
 
 
@@ -216,6 +266,7 @@ def _is_hsr_archive_url(url: str) -> bool:
     return "honkai-star-rail" in url.lower() and "/archives/" in url
 
 
+@memoize_extractor
 def extract_hsr_events(soup: BeautifulSoup, base_url: str) -> List[str]:
     """
     Parses HSR events page for current and upcoming events.
@@ -223,18 +274,15 @@ def extract_hsr_events(soup: BeautifulSoup, base_url: str) -> List[str]:
     which the generic extractor cannot handle (it stops at the first H3).
     """
     bullets: List[str] = []
-    all_headers = list(soup.find_all(["h2", "h3", "h4"]))
+    h2_txt = [(h, _header_text(h)) for h in soup.find_all("h2")]
 
     sections = [
-        ("__Current Events__", _HSR_CURRENT_EVENTS_HINTS),
-        ("__Upcoming Events__", _HSR_UPCOMING_EVENTS_HINTS),
+        ("__Current Events__", _HSR_CURRENT_EVENTS_MATCH),
+        ("__Upcoming Events__", _HSR_UPCOMING_EVENTS_MATCH),
     ]
 
     for section_title, hints in sections:
-        section_head = next(
-            (h for h in all_headers if h.name == "h2" and any(hint in _header_text(h) for hint in hints)),
-            None,
-        )
+        section_head = next((h for h, t in h2_txt if _match_header(t, hints)), None)
         if not section_head:
             continue
 
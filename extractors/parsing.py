@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Shared soup construction and memoization for the Game8 extractors.
+"""
+
+import functools
+import re
+import weakref
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from bs4 import BeautifulSoup, FeatureNotFound, PageElement, Tag
+
+
+def make_soup(html: str) -> BeautifulSoup:
+    """
+    Parse the whole page with lxml (falling back to html.parser). No SoupStrainer: Game8
+    wraps the entire body in divs, so it would save almost nothing, and
+    scraper.extract_last_updated needs the full page text.
+    """
+    try:
+        return BeautifulSoup(html, "lxml")
+    except FeatureNotFound:
+        return BeautifulSoup(html, "html.parser")
+
+
+_ARTICLE_ROOT_RE = re.compile(r"(article|content).*(body|main)", re.I)
+
+
+def find_article_root(soup: BeautifulSoup) -> Tag:
+    """
+    Game8 pages generally wrap the main content in an article/body container.
+    Constrain to this area to avoid global nav/footers. Candidates are tried in
+    order and the later (whole-document) lookups only run when earlier ones miss.
+    """
+    for find in (
+        lambda: soup.find(id=_ARTICLE_ROOT_RE),
+        lambda: soup.find(class_=_ARTICLE_ROOT_RE),
+        lambda: soup.find("article"),
+        lambda: soup.find("main"),
+    ):
+        cand = find()
+        if isinstance(cand, Tag):
+            return cand
+    return soup  # fallback
+
+
+def url_joiner(base_url: str) -> Callable[[str], str]:
+    """
+    ``urljoin(base_url, href)`` with base_url split once per page: absolute and plain
+    root-relative hrefs (the common Game8 cases) resolve by concatenation, anything else
+    (relative paths, dot segments, protocol-relative) still goes through urljoin.
+    """
+    sp = urlsplit(base_url)
+    root = f"{sp.scheme}://{sp.netloc}"
+
+    def join(href: str) -> str:
+        if href.startswith(("http://", "https://")):
+            return href
+        if href.startswith("/") and not href.startswith("//") and "/." not in href:
+            return root + href
+        return urljoin(base_url, href)
+
+    return join
+
+
+def following_tags(tag: Tag) -> Iterator[Tag]:
+    """
+    Lazy equivalent of ``tag.find_all_next()``: the Tags after ``tag`` in document order.
+    Walks that stop at the next header only touch their own section instead of building
+    a list of the rest of the page for every header.
+    """
+    for el in tag.next_elements:
+        if isinstance(el, Tag):
+            yield el
+
+
+def after_subtree(tag: Tag) -> Optional[PageElement]:
+    """
+    First element after ``tag`` and all of its descendants in document order (None at the
+    end of the document). Lets a forward walk hop over a block it has already scanned in one
+    step instead of visiting every nested row, cell and image.
+    """
+    node: Optional[PageElement] = tag
+    while node is not None:
+        if node.next_sibling is not None:
+            return node.next_sibling
+        node = node.parent
+    return None
+
+
+def iter_anchors(root: Tag) -> Iterator[Tag]:
+    """Yield <a href> descendants in document order without building a find_all filter."""
+    for t in root.descendants:
+        if getattr(t, "name", None) == "a" and t.has_attr("href"):
+            yield t
+
+
+def inside(tag: Tag, container: Optional[Tag]) -> bool:
+    """
+    True when ``tag`` is a descendant of ``container``. Forward walks (find_all_next)
+    yield a block's descendants right after the block itself, so once a block's anchors
+    have been scanned its descendants can be skipped instead of re-scanning the subtree.
+    """
+    if container is None:
+        return False
+    for parent in tag.parents:
+        if parent is container:
+            return True
+    return False
+
+
+_MEMO_MAX_ENTRIES = 64
+
+
+def memoize_extractor(func: Callable[[BeautifulSoup, str], List[str]]) -> Callable[[BeautifulSoup, str], List[str]]:
+    """
+    Cache an extractor's bullets per (soup, base_url) so repeated calls on the same parsed
+    page skip the walk. Entries hold a weakref to the soup so a recycled id() never hits
+    a stale result; the oldest entries are evicted past _MEMO_MAX_ENTRIES.
+    """
+    cache: Dict[Tuple[int, str], Tuple["weakref.ref[BeautifulSoup]", List[str]]] = {}
+
+    @functools.wraps(func)
+    def wrapper(soup: BeautifulSoup, base_url: str) -> List[str]:
+        key = (id(soup), base_url)
+        hit = cache.get(key)
+        if hit is not None and hit[0]() is soup:
+            return list(hit[1])
+        result = func(soup, base_url)
+        cache.pop(key, None)
+        cache[key] = (weakref.ref(soup), list(result))
+        while len(cache) > _MEMO_MAX_ENTRIES:
+            del cache[next(iter(cache))]
+        return result
+
+    wrapper.cache_clear = cache.clear  # type: ignore[attr-defined]
+    return wrapper
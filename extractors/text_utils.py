@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Text normalization and bullet formatting shared by the Game8 extractors. Both cleaners
+are pure and memoized, so a label or block text seen by any extractor in the run is only
+regex-scrubbed once.
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+
+_WS_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def clean_ws(s: Optional[str]) -> str:
+    """Collapse whitespace runs to single spaces and strip the ends (None -> "")."""
+    return _WS_RE.sub(" ", s or "").strip()
+
+
+@lru_cache(maxsize=4096)
+def clean_text(s: str) -> str:
+    """clean_ws plus removal of the markdown markers (**, __, `) Discord would interpret."""
+    return clean_ws(s).replace("**", "").replace("__", "").replace("`", "")
+
+
+# (label, absolute href, info) as collected; formatted into a bullet only once it is kept
+LinkEntry = Tuple[str, str, Optional[str]]
+
+
+def link_bullet(label: str, href: str, info: Optional[str]) -> str:
+    """Markdown bullet for a collected entry: "• [label](href) — info", info omitted when empty."""
+    return f"• [{label}]({href}) — {info}" if info else f"• [{label}]({href})"
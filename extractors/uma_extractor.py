@@ -1,77 +1,50 @@
 # -*- coding: utf-8 -*-
 import re
-from typing import List, Optional, Tuple
-from urllib.parse import urljoin
+from functools import lru_cache
+from typing import List, Optional
 from bs4 import BeautifulSoup, Tag
 
+from .parsing import find_article_root, following_tags, memoize_extractor, url_joiner
+from .text_utils import LinkEntry as _Entry, clean_text as _clean, link_bullet as _bullet
+
 # --- Local helpers (self-contained; no imports from main) ---
 
-def _clean(s: str) -> str:
-    import re as _re
-    s = _re.sub(r"\s+", " ", s).strip()
-    return s.replace("**", "").replace("__", "").replace("`", "")
+# "Duration"/"期間" labels, "to ", dashes or a year, in a single pass
+_DURATIONISH_RE = re.compile(r"Duration|期間|to |[–—-]|\b\d{4}\b")
+# javascript:/mailto: links, bare "#" anchors and account pages
+_BAD_HREF_RE = re.compile(r"^\s*(?:javascript:|mailto:)|/login|/register|/signup|/account|#\s*$", re.I)
+
+# separators left between an anchor label and its info text
+_TRIM_CHARS = ":-—– "
 
 def _anchor_text(a: Tag) -> str:
     return _clean(a.get_text(" ", strip=True))
 
+# Info strings repeat across blocks and sections; the check is pure
+@lru_cache(maxsize=4096)
 def _durationish(s: str) -> bool:
-    return any(k in s for k in ["Duration", "Event Duration", "期間", "to ", "–", "—", "-"]) or bool(re.search(r"\b\d{4}\b", s))
+    return _DURATIONISH_RE.search(s) is not None
 
 def _bad_href(u: str) -> bool:
-    if not u:
-        return True
-    ul = u.lower().strip()
-    if ul.startswith("javascript:") or ul.startswith("mailto:") or ul.endswith("#"):
-        return True
-    if any(p in ul for p in ["/login", "/register", "/signup", "/account"]):
-        return True
-    return False
+    return not u or _BAD_HREF_RE.search(u) is not None
 
 def _is_good_umamusume_url(u: str) -> bool:
     if _bad_href(u):
         return False
     ul = u.lower()
-    if "umamusume-pretty-derby" not in ul:
-        return False
-    if any(x in ul for x in ["/login", "/register", "/signup", "/account", "javascript:void(0)"]):
-        return False
-    return True
-
-_BULLET_RE = re.compile(
-    r"^\s*•\s*(?:\[(?P<label>[^\]]+)\]\((?P<link>[^)]+)\)|(?P<label2>[^—]+?))\s*(?:—\s*(?P<info>.+))?\s*$"
-)
-def _parse_bullet(line: str) -> Tuple[str, Optional[str], Optional[str]]:
-    m = _BULLET_RE.match(line.strip())
-    if not m:
-        return (line.strip().lstrip("• ").strip(), None, None)
-    label = (m.group("label") or m.group("label2") or "").strip()
-    link = (m.group("link") or None)
-    info = (m.group("info") or None)
-    return (label, link, info)
-
-def _find_article_root(soup: BeautifulSoup) -> Tag:
-    """
-    Game8 pages generally wrap the main content in an article/body container.
-    Constrain to this area to avoid global nav/footers.
-    """
-    candidates = [
-        soup.find(id=re.compile(r"(article|content).*(body|main)", re.I)),
-        soup.find(class_=re.compile(r"(article|content).*(body|main)", re.I)),
-        soup.find("article"),
-        soup.find("main"),
-    ]
-    for c in candidates:
-        if isinstance(c, Tag):
-            return c
-    return soup  # fallback
-
-def _collect_items_near_head(head: Tag, base_url: str, max_items: int = 10) -> List[str]:
-    items: List[str] = []
-    seen = set()
+    return "umamusume-pretty-derby" in ul and "javascript:void(0)" not in ul
 
-    for sib in head.find_all_next():
-        if sib is head:
-            continue
+def _collect_items_near_head(head: Tag, base_url: str, max_items: int = 10) -> List[_Entry]:
+    items: List[_Entry] = []
+    seen = set()
+    # nested blocks often share their first anchor; an anchor's outcome never changes
+    # between visits, so it is only evaluated the first time (keyed by id while the soup lives)
+    visited = set()
+    abs_url = url_joiner(base_url)
+
+    # each block only contributes its first anchor, so nested blocks are visited too;
+    # the walk is lazy and ends at the next header
+    for sib in following_tags(head):
         if sib.name in ["h2", "h3"]:
             break
 
@@ -85,8 +58,9 @@ def _collect_items_near_head(head: Tag, base_url: str, max_items: int = 10) -> L
 
         for block in candidate_blocks:
             a = block.find("a", href=True)
-            if not a:
+            if not a or id(a) in visited:
                 continue
+            visited.add(id(a))
             href = a.get("href", "")
             if not _is_good_umamusume_url(href):
                 continue
@@ -95,7 +69,7 @@ def _collect_items_near_head(head: Tag, base_url: str, max_items: int = 10) -> L
             if not label or len(label) < 2:
                 continue
 
-            abs_href = urljoin(base_url, href)
+            abs_href = abs_url(href)
             key = (label.lower(), abs_href)
             if key in seen:
                 continue
@@ -107,7 +81,7 @@ def _collect_items_near_head(head: Tag, base_url: str, max_items: int = 10) -> L
                 bt = block_text
                 if bt.lower().startswith(label.lower()):
                     bt = bt[len(label):]
-                bt = _clean(bt.strip(":-—– "))
+                bt = _clean(bt.strip(_TRIM_CHARS))
                 if _durationish(bt):
                     info = bt
 
@@ -125,8 +99,7 @@ def _collect_items_near_head(head: Tag, base_url: str, max_items: int = 10) -> L
                     if _durationish(nt) and len(nt) < 140:
                         info = nt
 
-            line = f"• [{label}]({abs_href})" + (f" — {info}" if info else "")
-            items.append(line)
+            items.append((label, abs_href, info))
 
             if len(items) >= max_items:
                 return items
@@ -135,29 +108,32 @@ def _collect_items_near_head(head: Tag, base_url: str, max_items: int = 10) -> L
 
 # --- Public API ---
 
+_SECTION_HINTS = [
+    "ongoing events",
+    "current events",
+    "event list",
+    "event choices",
+    "story events",
+    "campaigns",
+    "races",
+    "training events",
+    "latest events",
+    "featured events",
+]
+_SECTION_HINTS_RE = re.compile("|".join(re.escape(h) for h in _SECTION_HINTS), re.I)
+
+@memoize_extractor
 def extract_umamusume_events(soup: BeautifulSoup, base_url: str) -> List[str]:
     """
     Focus on sections present on the Umamusume Events/Choices page and
     ignore site-chrome links like 'Sign Up' / 'Log In'.
     """
-    root = _find_article_root(soup)
-    SECTION_HINTS = [
-        "ongoing events",
-        "current events",
-        "event list",
-        "event choices",
-        "story events",
-        "campaigns",
-        "races",
-        "training events",
-        "latest events",
-        "featured events",
-    ]
+    root = find_article_root(soup)
 
     heads: List[Tag] = []
     for h in root.find_all(["h2", "h3"]):
-        txt = _clean(h.get_text(" ", strip=True)).lower()
-        if any(hint in txt for hint in SECTION_HINTS):
+        txt = _clean(h.get_text(" ", strip=True))
+        if _SECTION_HINTS_RE.search(txt):
             heads.append(h)
 
     bullets: List[str] = []
@@ -165,15 +141,15 @@ def extract_umamusume_events(soup: BeautifulSoup, base_url: str) -> List[str]:
         for head in heads[:4]:
             title = _clean(head.get_text(" ", strip=True))
             bullets.append(f"__{title}__")
-            for line in _collect_items_near_head(head, base_url, max_items=10):
+            for label, link, info in _collect_items_near_head(head, base_url, max_items=10):
                 # Tighten to Umamusume-specific links only
-                label, link, info = _parse_bullet(line)
-                if link and not _is_good_umamusume_url(link):
+                if not _is_good_umamusume_url(link):
                     continue
-                bullets.append(line)
+                bullets.append(_bullet(label, link, info))
     else:
         # Conservative fallback: scan anchors in article root only and whitelist the game path
         seen = set()
+        abs_url = url_joiner(base_url)
         for a in root.find_all("a", href=True):
             href = a["href"]
             if not _is_good_umamusume_url(href):
@@ -181,7 +157,7 @@ def extract_umamusume_events(soup: BeautifulSoup, base_url: str) -> List[str]:
             label = _anchor_text(a)
             if not label or len(label) < 3:
                 continue
-            abs_href = urljoin(base_url, href)
+            abs_href = abs_url(href)
             key = (label.lower(), abs_href)
             if key in seen:
                 continue
@@ -194,7 +170,7 @@ def extract_umamusume_events(soup: BeautifulSoup, base_url: str) -> List[str]:
                 pt = _clean(parent.get_text(" ", strip=True))
                 if _durationish(pt) and len(pt) < 160:
                     info = pt
-            bullets.append(f"• [{label}]({abs_href})" + (f" — {info}" if info else ""))
+            bullets.append(_bullet(label, abs_href, info))
             if len(bullets) >= 12:
                 break
 
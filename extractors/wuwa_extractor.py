@@ -1,29 +1,49 @@
 # wuwa_extractor.py
 
-from typing import List, Optional
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
 import re
-from urllib.parse import urljoin
 from bs4 import BeautifulSoup, Tag
 
-def _clean(s: str) -> str:
-    import re as _re
-    return _re.sub(r"\s+", " ", s or "").strip()
-
+from .parsing import find_article_root, following_tags, inside, memoize_extractor, url_joiner
+from .text_utils import LinkEntry as _Entry, clean_ws as _clean, link_bullet as _bullet
+
+_YEAR_RE = re.compile(r"\b\d{4}\b")
+# catches "Sep 17, 2025 - Oct 8, 2025", "Duration"/"期間" labels, " to ", dashes and years
+_DURATIONISH_RE = re.compile(r"Duration|期間| to |[–—-]|\b\d{4}\b")
+# javascript:/mailto: links, bare "#" anchors, account pages and site chrome
+_BAD_HREF_RE = re.compile(
+    r"^\s*(?:javascript:|mailto:)|/login|/register|/signup|/account|site-interface|#\s*$", re.I
+)
+# separators left around an info string once the anchor label is cut out
+_TRIM_CHARS = ": -—–"
+_MONTH = r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?"
+_DATE_RANGE_RE = re.compile(rf"{_MONTH}\s+\d{{1,2}},\s*\d{{4}}\s*[-–—]\s*{_MONTH}\s+\d{{1,2}},\s*\d{{4}}", re.I)
+
+def _without_label(text: str, label: str) -> str:
+    """
+    Same as _clean(text.replace(label, "")).strip(": -—–") for an already-cleaned `text`,
+    but the usual single occurrence of the label is cut out with a partition instead of
+    a replace plus a whitespace-regex pass.
+    """
+    before, found, after = text.partition(label)
+    if not found:
+        return text.strip(_TRIM_CHARS)
+    if label in after:
+        return _clean(text.replace(label, "")).strip(_TRIM_CHARS)
+    if before.endswith(" ") and after.startswith(" "):
+        after = after[1:]
+    return (before + after).strip(_TRIM_CHARS)
+
+# Info strings repeat across blocks and sections; the check is pure
+@lru_cache(maxsize=4096)
 def _durationish(s: str) -> bool:
-    s = s or ""
-    # catches "Sep 17, 2025 - Oct 8, 2025", "to", dashes, and years
-    return any(k in s for k in ["Duration", "Event Duration", "期間", " to ", "–", "—", "-"]) or bool(re.search(r"\b\d{4}\b", s))
-
-def _find_article_root(soup: BeautifulSoup) -> Tag:
-    for cand in [
-        soup.find(id=re.compile(r"(article|content).*(body|main)", re.I)),
-        soup.find(class_=re.compile(r"(article|content).*(body|main)", re.I)),
-        soup.find("article"),
-        soup.find("main"),
-    ]:
-        if isinstance(cand, Tag):
-            return cand
-    return soup
+    return bool(s) and _DURATIONISH_RE.search(s) is not None
+
+def _hints_re(hints: List[str]) -> "re.Pattern[str]":
+    """Compile substring hints into one case-insensitive alternation, scanned once per header text."""
+    return re.compile("|".join(re.escape(h) for h in hints), re.I)
 
 _CURRENT_HEAD_HINTS = [
     "available convene banners",
@@ -53,48 +73,55 @@ _SECTION_BREAK_HINTS = [
     "related guides",
 ]
 
+_CURRENT_HEAD_RE = _hints_re(_CURRENT_HEAD_HINTS)
+_UPCOMING_HEAD_RE = _hints_re(_UPCOMING_HEAD_HINTS)
+_SECTION_BREAK_RE = _hints_re(_SECTION_BREAK_HINTS)
+
 def _bad_href(u: str) -> bool:
-    if not u:
-        return True
-    ul = u.lower().strip()
-    if ul.startswith(("javascript:", "mailto:")) or ul.endswith("#"):
-        return True
-    if any(p in ul for p in ["/login", "/register", "/signup", "/account", "site-interface"]):
-        return True
-    return False
-
-def _is_section_break(tag: Tag) -> bool:
-    txt = _clean(tag.get_text(" ", strip=True)).lower()
-    return any(h in txt for h in _SECTION_BREAK_HINTS)
-
-def _gather_date_near(head: Tag) -> Optional[str]:
-    MONTH = r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?"
-    RANGE = re.compile(rf"{MONTH}\s+\d{{1,2}},\s*\d{{4}}\s*[-–—]\s*{MONTH}\s+\d{{1,2}},\s*\d{{4}}", re.I)
-    for sib in head.find_all_next(limit=80):
-        if sib is head:
-            continue
-        if getattr(sib, "name", "") in ("h2", "h3") and _is_section_break(sib):
+    return not u or _BAD_HREF_RE.search(u) is not None
+
+def _header_index(root: Tag) -> Dict[int, Tuple[Tag, str]]:
+    """Every h2/h3/h4 under root with its cleaned text, keyed by id(tag), in document order."""
+    return {id(h): (h, _clean(h.get_text(" ", strip=True))) for h in root.find_all(["h2", "h3", "h4"])}
+
+def _is_section_break(tag: Tag, headers: Optional[Dict[int, Tuple[Tag, str]]] = None) -> bool:
+    hit = headers.get(id(tag)) if headers else None
+    txt = hit[1] if hit else _clean(tag.get_text(" ", strip=True))
+    return _SECTION_BREAK_RE.search(txt) is not None
+
+def _gather_date_near(head: Tag, headers: Optional[Dict[int, Tuple[Tag, str]]] = None) -> Optional[str]:
+    for sib in islice(following_tags(head), 80):
+        if sib.name in ("h2", "h3") and _is_section_break(sib, headers):
             break
-        text = _clean(getattr(sib, "get_text", lambda *_: "")(" ", strip=True))
+        text = _clean(sib.get_text(" ", strip=True))
         if not text:
             continue
-        m = RANGE.search(text)
+        m = _DATE_RANGE_RE.search(text)
         if m:
             return m.group(0)
-        if _durationish(text) and 8 < len(text) < 80 and re.search(r"\b\d{4}\b", text):
+        if _durationish(text) and 8 < len(text) < 80 and _YEAR_RE.search(text):
             return text
     return None
 
-def _collect_links_in_section(head: Tag, base_url: str, max_items: int = 12) -> List[str]:
-    items: List[str] = []
+def _collect_links_in_section(
+    head: Tag, base_url: str, max_items: int = 12, headers: Optional[Dict[int, Tuple[Tag, str]]] = None
+) -> List[_Entry]:
+    items: List[_Entry] = []
     seen = set()
+    abs_url = url_joiner(base_url)
 
-    for sib in head.find_all_next():
-        if sib is head:
-            continue
-        if getattr(sib, "name", "") in ("h2", "h3") and _is_section_break(sib):
+    # last block whose anchors were scanned; its descendants are skipped below
+    scanned: Optional[Tag] = None
+
+    for sib in following_tags(head):
+        if sib.name in ("h2", "h3") and _is_section_break(sib, headers):
             break
 
+        if scanned is not None:
+            if inside(sib, scanned):
+                continue
+            scanned = None
+
         blocks: List[Tag] = []
         if sib.name in ("ul", "ol"):
             blocks.extend(sib.find_all("li", recursive=False))
@@ -102,16 +129,19 @@ def _collect_links_in_section(head: Tag, base_url: str, max_items: int = 12) ->
             blocks.extend(sib.find_all("tr"))
         elif sib.name in ("div", "p"):
             blocks.append(sib)
+        if blocks:
+            scanned = sib
 
         for blk in blocks:
             for a in blk.find_all("a", href=True):
-                label = _clean(a.get_text(" ", strip=True))
-                if not label or len(label) < 2:
-                    continue
+                # cheap href test first: site-chrome anchors never pay for get_text
                 href = a.get("href", "")
                 if _bad_href(href):
                     continue
-                abs_href = urljoin(base_url, href)
+                label = _clean(a.get_text(" ", strip=True))
+                if not label or len(label) < 2:
+                    continue
+                abs_href = abs_url(href)
                 key = (label.lower(), abs_href)
                 if key in seen:
                     continue
@@ -120,53 +150,49 @@ def _collect_links_in_section(head: Tag, base_url: str, max_items: int = 12) ->
                 info = None
                 bt = _clean(blk.get_text(" ", strip=True))
                 if bt and bt.lower() != label.lower() and _durationish(bt):
-                    pruned = _clean(bt.replace(label, "")).strip(": -—–")
+                    pruned = _without_label(bt, label)
                     if pruned and pruned != label and len(pruned) < 140:
                         info = pruned
 
-                items.append(f"• [{label}]({abs_href})" + (f" — {info}" if info else ""))
+                items.append((label, abs_href, info))
                 if len(items) >= max_items:
                     return items
 
     return items
 
-def _first_head_with_hints(root: Tag, hints: list[str]) -> Optional[Tag]:
-    for h in root.find_all(["h2", "h3", "h4"]):
-        t = _clean(h.get_text(" ", strip=True)).lower()
-        if any(k in t for k in hints):
+def _first_head_with_hints(headers: Dict[int, Tuple[Tag, str]], hints_re: "re.Pattern[str]") -> Optional[Tag]:
+    for h, t in headers.values():
+        if hints_re.search(t):
             return h
     return None
 
+@memoize_extractor
 def extract_wuwa_gachas(soup: BeautifulSoup, base_url: str) -> List[str]:
     """Parse the Wuthering Waves banner schedule page for current AND upcoming banners."""
     bullets: List[str] = []
-    root = _find_article_root(soup)
+    root = find_article_root(soup)
+    # header texts are read by the head lookups and by both section walks; serialize them once
+    headers = _header_index(root)
 
     # CURRENT
-    current_head = _first_head_with_hints(root, _CURRENT_HEAD_HINTS)
+    current_head = _first_head_with_hints(headers, _CURRENT_HEAD_RE)
     cur_lines: List[str] = ["__Current Banners / Gacha__"]
     if current_head:
-        shared_dates = _gather_date_near(current_head)
-        items = _collect_links_in_section(current_head, base_url, max_items=12)
-        chosen = items
-
-        if shared_dates:
-            fixed = []
-            for line in chosen:
-                fixed.append(line if " — " in line else f"{line} — {shared_dates}")
-            chosen = fixed
-        cur_lines.extend(chosen[:12])
+        shared_dates = _gather_date_near(current_head, headers)
+        items = _collect_links_in_section(current_head, base_url, max_items=12, headers=headers)
+        # entries without their own info inherit the section's shared date range
+        cur_lines.extend(_bullet(label, href, info or shared_dates) for label, href, info in items[:12])
     else:
         cur_lines.append("• _No parseable banners found (layout may have changed)._")
     bullets.extend(cur_lines)
 
     # UPCOMING
-    upcoming_head = _first_head_with_hints(root, _UPCOMING_HEAD_HINTS)
+    upcoming_head = _first_head_with_hints(headers, _UPCOMING_HEAD_RE)
     if upcoming_head:
-        up_items = _collect_links_in_section(upcoming_head, base_url, max_items=12)
+        up_items = _collect_links_in_section(upcoming_head, base_url, max_items=12, headers=headers)
         if up_items:
             bullets.append("__Upcoming Banners / Gacha__")
-            bullets.extend(up_items[:12])
+            bullets.extend(_bullet(*entry) for entry in up_items[:12])
 
     return bullets
 
@@ -176,40 +202,50 @@ def extract_wuwa_gachas(soup: BeautifulSoup, base_url: str) -> List[str]:
 _WUWA_CURRENT_EVENTS_HINTS = ["ongoing events", "current events", "featured events"]
 _WUWA_UPCOMING_EVENTS_HINTS = ["upcoming events", "future events"]
 _WUWA_STOP_HINTS = ["permanent events", "related guides", "comment", "all events"]
+_WUWA_CURRENT_EVENTS_RE = _hints_re(_WUWA_CURRENT_EVENTS_HINTS)
+_WUWA_UPCOMING_EVENTS_RE = _hints_re(_WUWA_UPCOMING_EVENTS_HINTS)
 
 
-def _match_event_header(tag: Tag, hints: list[str]) -> bool:
-    """Check if a header tag matches any of the hint phrases."""
-    t = _clean(tag.get_text(" ", strip=True)).lower()
-    return any(h in t for h in hints)
-
-
-def _collect_events_from_section(head: Tag, base_url: str, stop_on: list[str], max_items: int = 12) -> List[str]:
+def _collect_events_from_section(
+    head: Tag,
+    base_url: str,
+    stop_on: list[str],
+    max_items: int = 12,
+    headers: Optional[Dict[int, Tuple[Tag, str]]] = None,
+) -> List[_Entry]:
     """Walk forward from header, collecting event links from tables and lists."""
-    items: List[str] = []
+    items: List[_Entry] = []
     seen = set()
+    stop_re = _hints_re(stop_on + _WUWA_STOP_HINTS)
+    abs_url = url_joiner(base_url)
+    # last table/list whose anchors were scanned; its descendants are skipped below
+    scanned: Optional[Tag] = None
 
-    for sib in head.find_all_next():
-        if sib is head:
-            continue
-
+    for sib in following_tags(head):
         # Stop at headers that indicate a different section
-        if getattr(sib, "name", "") in ("h2", "h3", "h4"):
-            t = _clean(sib.get_text(" ", strip=True)).lower()
-            if any(h in t for h in stop_on + _WUWA_STOP_HINTS):
+        if sib.name in ("h2", "h3", "h4"):
+            hit = headers.get(id(sib)) if headers else None
+            t = hit[1] if hit else _clean(sib.get_text(" ", strip=True))
+            if stop_re.search(t):
                 break
 
+        if scanned is not None:
+            if inside(sib, scanned):
+                continue
+            scanned = None
+
         # Collect from tables
         if sib.name == "table":
+            scanned = sib
             for row in sib.find_all("tr"):
                 for a in row.find_all("a", href=True):
-                    label = _clean(a.get_text(" ", strip=True))
-                    if not label or len(label) < 2:
-                        continue
                     href = a.get("href", "")
                     if _bad_href(href):
                         continue
-                    abs_href = urljoin(base_url, href)
+                    label = _clean(a.get_text(" ", strip=True))
+                    if not label or len(label) < 2:
+                        continue
+                    abs_href = abs_url(href)
                     key = (label.lower(), abs_href)
                     if key in seen:
                         continue
@@ -219,25 +255,26 @@ def _collect_events_from_section(head: Tag, base_url: str, stop_on: list[str], m
                     info = None
                     row_text = _clean(row.get_text(" ", strip=True))
                     if row_text and row_text.lower() != label.lower() and _durationish(row_text):
-                        pruned = _clean(row_text.replace(label, "")).strip(": -—–")
+                        pruned = _without_label(row_text, label)
                         if pruned and len(pruned) < 140:
                             info = pruned
 
-                    items.append(f"• [{label}]({abs_href})" + (f" — {info}" if info else ""))
+                    items.append((label, abs_href, info))
                     if len(items) >= max_items:
                         return items
 
         # Collect from lists
         if sib.name in ("ul", "ol"):
+            scanned = sib
             for li in sib.find_all("li", recursive=False):
                 for a in li.find_all("a", href=True):
-                    label = _clean(a.get_text(" ", strip=True))
-                    if not label or len(label) < 2:
-                        continue
                     href = a.get("href", "")
                     if _bad_href(href):
                         continue
-                    abs_href = urljoin(base_url, href)
+                    label = _clean(a.get_text(" ", strip=True))
+                    if not label or len(label) < 2:
+                        continue
+                    abs_href = abs_url(href)
                     key = (label.lower(), abs_href)
                     if key in seen:
                         continue
@@ -247,35 +284,37 @@ def _collect_events_from_section(head: Tag, base_url: str, stop_on: list[str], m
                     info = None
                     li_text = _clean(li.get_text(" ", strip=True))
                     if li_text and li_text.lower() != label.lower() and _durationish(li_text):
-                        pruned = _clean(li_text.replace(label, "")).strip(": -—–")
+                        pruned = _without_label(li_text, label)
                         if pruned and len(pruned) < 140:
                             info = pruned
 
-                    items.append(f"• [{label}]({abs_href})" + (f" — {info}" if info else ""))
+                    items.append((label, abs_href, info))
                     if len(items) >= max_items:
                         return items
 
     return items
 
 
+@memoize_extractor
 def extract_wuwa_events(soup: BeautifulSoup, base_url: str) -> List[str]:
     """Parse WuWa events page for ongoing and upcoming events."""
     bullets: List[str] = []
-    root = _find_article_root(soup)
-    headers = list(root.find_all(["h2", "h3", "h4"]))
+    root = find_article_root(soup)
+    # both section lookups and both walks' stop checks read header text; serialize it once
+    headers = _header_index(root)
 
     sections = [
-        ("__Ongoing Events__", _WUWA_CURRENT_EVENTS_HINTS, ["upcoming"]),
-        ("__Upcoming Events__", _WUWA_UPCOMING_EVENTS_HINTS, ["ongoing", "permanent"]),
+        ("__Ongoing Events__", _WUWA_CURRENT_EVENTS_RE, ["upcoming"]),
+        ("__Upcoming Events__", _WUWA_UPCOMING_EVENTS_RE, ["ongoing", "permanent"]),
     ]
 
     for title, hints, stop_on in sections:
-        head = next((h for h in headers if _match_event_header(h, hints)), None)
+        head = _first_head_with_hints(headers, hints)
         if head:
-            rows = _collect_events_from_section(head, base_url, stop_on)
+            rows = _collect_events_from_section(head, base_url, stop_on, headers=headers)
             if rows:
                 bullets.append(title)
-                bullets.extend(rows)
+                bullets.extend(_bullet(*entry) for entry in rows)
 
     if not bullets:
         return ["__Wuthering Waves Events__", "• _No events found._"]
@@ -9,7 +9,7 @@ MTG Arena → Discord webhook notifier (Draftsim).
   * MTG Arena Experience Codes
   * MTG Arena Card Codes
   * MTG Arena Deck Codes
-- Posts ONE webhook message per newly discovered active code (across all sections).
+- Posts newly discovered active codes (across all sections), packing as many as fit into each message.
 - Optional role ping, but **only once per run** (first successfully posted new-code message).
 - Weekly health ping to a separate summary webhook when there's no new code for ≥ 7 days.
 
@@ -20,32 +20,57 @@ Env:
   DRY_RUN=true        -> don't post, just print (optional)
 """
 
+import heapq
 import json
 import os
 import re
 import time
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Union
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
 import requests
-from bs4 import BeautifulSoup, Tag
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer, Tag
 
 PAGE_URL = "https://draftsim.com/mtg-arena-codes/"
 STATE_PATH = Path("mtga_codes_state.json")
+DISCORD_CONTENT_LIMIT = 2000
+# Budget for the joined code blocks of one message. The rest of the 2000 characters covers the
+# role mention (~23), the "**MTG Arena — NN New Codes Found!**" header (~36), the page link (~39)
+# and the newlines between them.
+MESSAGE_BODY_LIMIT = 1850
+# One keep-alive session for the page fetch and every webhook post. Failed connects are
+# retried by urllib3 (nothing was sent yet, so it is safe for POSTs); 429/5xx handling stays
+# in post_webhook because it needs to read Retry-After.
 SESSION = requests.Session()
 SESSION.headers.update({"User-Agent": "mtga-codes/1.0 (+discord-webhook)"})
-
-
-def fetch_html(url: str) -> str:
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=2,
+        pool_maxsize=4,
+        max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.5),
+    ),
+)
+
+_WS_RE = re.compile(r"\s+")
+_PLACEHOLDER_EXACT = frozenset({"", "n/a", "na"})
+_UNKNOWN_EXP = frozenset({"unknown", "n/a", "na", ""})
+_TABLE_OR_HEADING = ["table", "h2", "h3"]
+
+
+def fetch_html(url: str) -> bytes:
+    # Raw bytes: the parser sniffs the encoding from the page itself, skipping requests' decode pass.
     r = SESSION.get(url, timeout=30)
     r.raise_for_status()
-    return r.text
+    return r.content
 
 
 def _clean_text(s: str) -> str:
-    return re.sub(r"\s+", " ", (s or "")).strip()
+    return _WS_RE.sub(" ", s or "").strip()
 
 
 def _normalize_code(code: str) -> str:
@@ -54,14 +79,15 @@ def _normalize_code(code: str) -> str:
 
 
 def _is_placeholder(code_text: str) -> bool:
-    # Skip placeholder rows like "None currently", "N/A", etc.
-    t = code_text.strip().lower()
-    return (not t) or ("none" in t) or (t in {"n/a", "na"})
+    # Skip placeholder rows like "None currently", "N/A", etc. (input is already _clean_text'd)
+    t = code_text.lower()
+    return (t in _PLACEHOLDER_EXACT) or ("none" in t)
 
 
 def _iter_section_tables(soup: BeautifulSoup) -> List[Tuple[str, Tag]]:
     """
-    Find section <h2> headers for categories and the first following <table>.
+    Find section <h2>/<h3> headers for categories and the first following <table>.
+    Only siblings up to the next <h2>/<h3> are considered; tables nested in wrappers are ignored.
     Returns list of (category, table_tag).
     """
     wanted = {
@@ -77,22 +103,10 @@ def _iter_section_tables(soup: BeautifulSoup) -> List[Tuple[str, Tag]]:
         heading = _clean_text(h.get_text(" "))
         key = heading.lower()
         if key in wanted:
-            # find the next table after this header
-            nxt = h.find_next(lambda t: isinstance(t, Tag) and t.name in ("table", "div"))
-            table = None
-            # Some pages wrap tables in a div; walk until a table or a new heading appears
-            p = h
-            while p:
-                p = p.find_next_sibling()
-                if not p:
-                    break
-                if isinstance(p, Tag) and p.name in ("h2", "h3"):
-                    break
-                if isinstance(p, Tag) and p.name == "table":
-                    table = p
-                    break
-            if table:
-                out.append((wanted[key], table))
+            # Some pages put other blocks in between; take the first table sibling before a new heading
+            nxt_sib = h.find_next_sibling(_TABLE_OR_HEADING)
+            if nxt_sib is not None and nxt_sib.name == "table":
+                out.append((wanted[key], nxt_sib))
     return out
 
 
@@ -137,13 +151,34 @@ def _parse_table(table: Tag) -> List[Dict]:
         exp = get(idx_exp) if idx_exp is not None else ""
 
         # Normalize "Unknown" / "N/A"
-        if exp.strip().lower() in {"unknown", "n/a", "na", ""}:
+        if exp.lower() in _UNKNOWN_EXP:
             exp = None
         items.append({"code": code, "reward": reward or None, "expires": exp})
     return items
 
 
-def extract_codes(html: str) -> List[Dict]:
+# The strainer is only consulted for top-level elements: unwrapping the document shell lets
+# head/script/style noise be dropped, while every kept container (and the heading → table
+# sibling runs _iter_section_tables walks) is built exactly as before.
+_SKIP_TOP_LEVEL = frozenset({"html", "head", "body", "script", "style", "noscript", "link", "meta", "svg", "iframe"})
+
+
+def _keep_top_level(name: str, attrs: Optional[Dict] = None) -> bool:
+    return name not in _SKIP_TOP_LEVEL
+
+
+PARSE_ONLY = SoupStrainer(_keep_top_level)
+
+
+def _make_soup(html: Union[str, bytes]) -> BeautifulSoup:
+    # lxml is much faster than the pure-Python parser; fall back if it isn't installed.
+    try:
+        return BeautifulSoup(html, "lxml", parse_only=PARSE_ONLY)
+    except FeatureNotFound:
+        return BeautifulSoup(html, "html.parser", parse_only=PARSE_ONLY)
+
+
+def extract_codes(html: Union[str, bytes]) -> List[Dict]:
     """
     Extract codes from Draftsim's MTG Arena codes page.
     Returns: list of dicts {code, reward, expires, category, source_line}
@@ -152,7 +187,7 @@ def extract_codes(html: str) -> List[Dict]:
     If nothing is parsed from those tables, we return [] and DO NOT try
     to heuristically scrape random text or the expired-codes archive.
     """
-    soup = BeautifulSoup(html, "html.parser")
+    soup = _make_soup(html)
     collected: List[Dict] = []
 
     for category, table in _iter_section_tables(soup):
@@ -188,7 +223,10 @@ def load_state() -> Dict:
 
 
 def save_state(state: Dict):
-    STATE_PATH.write_text(json.dumps(state, indent=2, ensure_ascii=False), encoding="utf-8")
+    # Write-then-rename so an interrupted run never leaves a truncated state file behind.
+    tmp = STATE_PATH.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(state, indent=2, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(STATE_PATH)
 
 
 def post_webhook(webhook_url: str, content: str, retries: int = 4) -> Optional[str]:
@@ -233,21 +271,55 @@ def post_webhook(webhook_url: str, content: str, retries: int = 4) -> Optional[s
     return None
 
 
-def format_new_code_message(item: Dict, role_mention: Optional[str]) -> str:
-    parts = []
-    if role_mention:
-        parts.append(role_mention)
-    parts.append("**MTG Arena — New Code Found!**")
-    parts.append(f"**Category:** {item.get('category', 'Unknown')}")
-    parts.append(f"`{item['code']}`")
+def format_code_block(item: Dict) -> str:
+    """One code's lines: its Draftsim section ("**Category:** Booster Pack"), the code, then reward/expiry if known."""
+    parts = [f"**Category:** {item.get('category', 'Unknown')}", f"`{item['code']}`"]
     if item.get("reward"):
         parts.append(f"**Reward:** {item['reward']}")
     if item.get("expires"):
         parts.append(f"**Expires:** {item['expires']}")
+    return "\n".join(parts)
+
+
+def format_new_codes_message(blocks: List[str], role_mention: Optional[str]) -> str:
+    """Optional role mention, a header with the code count, the blocks separated by blank lines, and the page link."""
+    parts = []
+    if role_mention:
+        parts.append(role_mention)
+    if len(blocks) == 1:
+        parts.append("**MTG Arena — New Code Found!**")
+    else:
+        parts.append(f"**MTG Arena — {len(blocks)} New Codes Found!**")
+    parts.append("\n\n".join(blocks))
     parts.append(f"<{PAGE_URL}>")
     return "\n".join(parts)
 
 
+def chunk_new_items(items: List[Dict], limit: int = MESSAGE_BODY_LIMIT) -> List[Tuple[List[Dict], List[str]]]:
+    """
+    Pack new codes into as few messages as possible: each group's Category/code/reward blocks
+    (joined by blank lines) stay within `limit`, so the full message stays under Discord's
+    2000-character cap. Returns (items, blocks) pairs in page order.
+    """
+    chunks: List[Tuple[List[Dict], List[str]]] = []
+    cur_items: List[Dict] = []
+    cur_blocks: List[str] = []
+    size = 0
+    for it in items:
+        block = format_code_block(it)
+        added = len(block) + (2 if cur_blocks else 0)
+        if cur_blocks and size + added > limit:
+            chunks.append((cur_items, cur_blocks))
+            cur_items, cur_blocks, size = [], [], 0
+            added = len(block)
+        cur_items.append(it)
+        cur_blocks.append(block)
+        size += added
+    if cur_blocks:
+        chunks.append((cur_items, cur_blocks))
+    return chunks
+
+
 def format_health_message(total_seen: int) -> str:
     return (
         "✅ **MTG Arena scraper health check**\n"
@@ -294,23 +366,26 @@ def main():
     # ---- Ping-once-per-run control ----
     ping_available = bool(role_mention_template)
 
-    # Announce NEW codes
-    for it in new_items:
+    # Announce NEW codes, packing as many as fit into each message
+    for chunk_items, blocks in chunk_new_items(new_items):
         role_for_this_message = role_mention_template if ping_available else None
-        content = format_new_code_message(it, role_for_this_message)
+        content = format_new_codes_message(blocks, role_for_this_message)
+        codes = ", ".join(it["code"] for it in chunk_items)
         mid = post_webhook(webhook_codes, content)
         if mid:
-            print(f"[OK] Announced new code {it['code']} (message id={mid})")
+            print(f"[OK] Announced new codes {codes} (message id={mid})")
             # Mark that we've used the ping for this run only after a successful send
             if ping_available:
                 ping_available = False
         else:
-            print(f"[WARN] Failed to announce code {it['code']}")
+            print(f"[WARN] Failed to announce codes {codes}")
 
     # Update state if new codes
     if new_items:
-        seen_codes.update(it["code"] for it in new_items)
-        state["seen_codes"] = sorted(seen_codes)
+        # Stored list is kept sorted, so merge in the (already unseen) new codes instead of re-sorting
+        new_codes = sorted({it["code"] for it in new_items})
+        seen_codes.update(new_codes)
+        state["seen_codes"] = list(heapq.merge(state.get("seen_codes", []), new_codes))
         save_state(state)
 
     # Health ping (only if no new codes and weekly cadence)
@@ -8,11 +8,14 @@ Split architecture:
 - extractors/genshin_extractor.py: Genshin-specific extraction
 - extractors/uma_extractor.py: Umamusume-specific extraction
 - extractors/generic_extractor.py: Fallback extraction used by other games
+- extractors/parsing.py: shared lxml soup construction and traversal helpers
 """
 
 import json
 import os
 import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Union
@@ -27,6 +30,7 @@ from extractors.generic_extractor import extract_events_with_links_generic
 from extractors.wuwa_extractor import extract_wuwa_gachas, extract_wuwa_events
 from extractors.hsr_extractor import extract_hsr_gachas, extract_hsr_events
 from extractors.endfield_extractor import extract_endfield_events, extract_endfield_gachas
+from extractors.parsing import make_soup
 
 # --- Config: pages -> (url, secret_name_for_webhook, pretty_title, secret_name_for_role_id) ---
 PAGES = {
@@ -102,10 +106,25 @@ DISABLE_UMA_EVENTS = os.getenv("DISABLE_UMA_EVENTS", "false").strip().lower() ==
 # Whether to delete old messages if we decide to re-post new chunked ones
 CLEANUP_OLD_MESSAGES = True
 
-# --- HTTP session (cloudscraper bypasses Cloudflare bot protection) ---
-SESSION = cloudscraper.create_scraper(
-    browser={"browser": "chrome", "platform": "windows", "mobile": False}
-)
+# Pages are downloaded concurrently up front; Discord I/O and diffing stay sequential
+FETCH_WORKERS = 4
+
+# --- HTTP sessions (cloudscraper bypasses Cloudflare bot protection) ---
+SCRAPER_BROWSER = {"browser": "chrome", "platform": "windows", "mobile": False}
+
+# Webhook traffic; only ever used from the main thread.
+SESSION = cloudscraper.create_scraper(browser=SCRAPER_BROWSER)
+
+# Page fetches run on the prefetch pool. CloudScraper mutates instance state while solving
+# challenges (cookies, headers, solve-depth counter), so each worker thread gets its own.
+_fetch_local = threading.local()
+
+
+def _page_scraper() -> cloudscraper.CloudScraper:
+    scraper = getattr(_fetch_local, "scraper", None)
+    if scraper is None:
+        scraper = _fetch_local.scraper = cloudscraper.create_scraper(browser=SCRAPER_BROWSER)
+    return scraper
 
 
 # --- Discord webhook helpers ---
@@ -170,11 +189,16 @@ def discord_webhook_post_embed(webhook_url: str, embed: Dict, content: Optional[
 # --- Scraping helpers ---
 
 def fetch(url: str) -> str:
-    r = SESSION.get(url, timeout=30)
+    r = _page_scraper().get(url, timeout=30)
     r.raise_for_status()
     return r.text
 
 
+def prefetch_pages(pool: ThreadPoolExecutor, urls: List[str]) -> Dict[str, "Future[str]"]:
+    """Start fetching every distinct URL on the pool; errors surface when the future is read."""
+    return {url: pool.submit(fetch, url) for url in dict.fromkeys(urls)}
+
+
 def extract_last_updated(soup: BeautifulSoup) -> str:
     # Try precise form first
     text = soup.get_text(" ", strip=True)
@@ -440,7 +464,7 @@ def extract_gacha_for(key: str, soup, url: str) -> list[str]:
     return []
 
 
-def run_flow(*, key: str, url: str, secret_name: str, nice_title: str, role_secret: str, ids: Dict, state: Dict, extractor, section_tag: str) -> Dict:
+def run_flow(*, key: str, url: str, secret_name: str, nice_title: str, role_secret: str, ids: Dict, state: Dict, extractor, section_tag: str, pages: Optional[Dict[str, "Future[str]"]] = None) -> Dict:
     """Generic runner for either events or gacha. section_tag is used to namespace message IDs and state keys."""
     webhook_url = os.environ.get(secret_name, "").strip()
     role_id = os.environ.get(role_secret, "").strip() if role_secret else ""
@@ -462,8 +486,8 @@ def run_flow(*, key: str, url: str, secret_name: str, nice_title: str, role_secr
             "role_mention": role_mention,
         }
 
-    html = fetch(url)
-    soup = BeautifulSoup(html, "html.parser")
+    html = pages[url].result() if pages and url in pages else fetch(url)
+    soup = make_soup(html)
 
     h_count = len(soup.find_all(["h2", "h3", "h4"]))
     snippet = html[:2000].lower()
@@ -484,6 +508,11 @@ def run_flow(*, key: str, url: str, secret_name: str, nice_title: str, role_secr
         if h_count == 0 or is_challenge:
             print(f"[DIAG] HTML[:400]: {html[:400].replace(chr(10), ' ')!r}")
 
+    # Everything below works on the bullets; tear the tree down now instead of keeping
+    # the whole page's node graph alive through the webhook round-trips.
+    soup.decompose()
+    del soup
+
     normalized_now = normalize_bullets(bullets)
     state_key = f"{key}::{section_tag}"
     prev_state = state.get(state_key, {"last_updated": None, "items": []})
@@ -582,25 +611,36 @@ def main():
         print(f"No matching keys for ONLY_KEY='{ONLY_KEY}'. Valid keys:", ", ".join(PAGES.keys()))
         return
 
-    # EVENTS
-    for key, (url, secret_name, nice_title, role_secret) in items:
-        res = run_flow(
-            key=key, url=url, secret_name=secret_name, nice_title=nice_title, role_secret=role_secret,
-            ids=ids, state=state, extractor=lambda soup, u: extract_events_with_links(soup, u), section_tag="events"
-        )
-        results.append(res)
-
-    # GACHAS
-    gacha_items = [(k, v) for k, v in GACHA_PAGES.items() if not ONLY_KEY or k.lower() == ONLY_KEY]
-    for key, (url, type_tag) in gacha_items:
-        if key not in PAGES:
-            continue
-        _, secret_name, nice_title, role_secret = PAGES[key]
-        res = run_flow(
-            key=key, url=url, secret_name=secret_name, nice_title=nice_title, role_secret=role_secret,
-            ids=ids, state=state, extractor=lambda soup, u, _k=key: extract_gacha_for(_k, soup, u), section_tag="gacha"
-        )
-        results.append(res)
+    gacha_items = [
+        (k, v) for k, v in GACHA_PAGES.items()
+        if (not ONLY_KEY or k.lower() == ONLY_KEY) and k in PAGES
+    ]
+
+    # Only pages with a configured webhook get fetched by run_flow; download those in parallel
+    fetch_urls = [url for _, (url, secret_name, _, _) in items if os.environ.get(secret_name, "").strip()]
+    fetch_urls += [url for key, (url, _) in gacha_items if os.environ.get(PAGES[key][1], "").strip()]
+
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        pages = prefetch_pages(pool, fetch_urls)
+
+        # EVENTS
+        for key, (url, secret_name, nice_title, role_secret) in items:
+            res = run_flow(
+                key=key, url=url, secret_name=secret_name, nice_title=nice_title, role_secret=role_secret,
+                ids=ids, state=state, extractor=lambda soup, u: extract_events_with_links(soup, u), section_tag="events",
+                pages=pages,
+            )
+            results.append(res)
+
+        # GACHAS
+        for key, (url, type_tag) in gacha_items:
+            _, secret_name, nice_title, role_secret = PAGES[key]
+            res = run_flow(
+                key=key, url=url, secret_name=secret_name, nice_title=nice_title, role_secret=role_secret,
+                ids=ids, state=state, extractor=lambda soup, u, _k=key: extract_gacha_for(_k, soup, u), section_tag="gacha",
+                pages=pages,
+            )
+            results.append(res)
 
     # Persist IDs/state
     save_ids(ids) if not DRY_RUN else None
@@ -0,0 +1,52 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import arknights_endfield_codes_scraper as endfield
+
+
+def _code_cell(code, extra=""):
+    return f'<td><input class="a-clipboard__textInput" value="{code}">{extra}</td>'
+
+
+def _page(rows):
+    return (
+        "<html><body><div class='wrapper'>"
+        "<h2>All Active Redeem Codes</h2>"
+        "<table><tr><th>Redeem Code</th><th>Rewards</th></tr>"
+        + "".join(rows)
+        + "</table>"
+        "<h2>Expired Codes</h2>"
+        "<table><tr><th>Code</th><th>Rewards</th></tr>"
+        + "<tr>" + _code_cell("OLDCODE99") + "<td>Gold x1</td></tr>"
+        + "</table></div></body></html>"
+    )
+
+
+def test_extract_codes_active_table_only():
+    html = _page([
+        "<tr>" + _code_cell("FIRST001") + "<td>Oroberyl x100 Expires 1/29/2026</td></tr>",
+        "<tr>" + _code_cell("SECOND002") + "<td>T-Creds x5000</td></tr>",
+    ])
+    items = endfield.extract_codes(html)
+    assert [it["code"] for it in items] == ["FIRST001", "SECOND002"]
+    assert items[0]["expires"] == "1/29/2026"
+
+
+def test_extract_codes_nested_table_keeps_later_rows():
+    nested = "<table><tr><td>Only for PC Version</td></tr></table>"
+    html = _page([
+        "<tr>" + _code_cell("FIRST001", nested) + "<td>Oroberyl x100</td></tr>",
+        "<tr>" + _code_cell("SECOND002") + "<td>T-Creds x5000</td></tr>",
+    ])
+    fragment = endfield._active_codes_fragment(html)
+    assert fragment is not None and "SECOND002" in fragment and "OLDCODE99" not in fragment
+    assert [it["code"] for it in endfield.extract_codes(html)] == ["FIRST001", "SECOND002"]
+
+
+def test_active_codes_fragment_unclosed_table_falls_back():
+    html = "<h2>Active Codes</h2><table><tr><td>X</td></tr>"
+    assert endfield._active_codes_fragment(html) is None
@@ -58,14 +58,11 @@ def test_build_message_regular(monkeypatch):
     assert used_mention is False
 
 
-def test_build_message_mention_replaces(monkeypatch):
+def test_build_message_mention_replaces(monkeypatch, tmp_path):
+    monkeypatch.setattr(daily_quotes, "HUMAN_USERS_CACHE_FILE", tmp_path / "cache.json")
     monkeypatch.setattr(daily_quotes.random, "random", lambda: 0.01)
     monkeypatch.setattr(daily_quotes, "get_channel_guild_id", lambda *_: "guild1")
-    monkeypatch.setattr(
-        daily_quotes,
-        "fetch_guild_members",
-        lambda *_: [{"user": {"id": "42", "bot": False}}],
-    )
+    monkeypatch.setattr(daily_quotes, "fetch_human_user_ids", lambda *_: ["42"])
     quotes = ["Regular only"]
     mention_quotes = ["Hello {user}!"]
     message, used_mention = daily_quotes.build_message(
@@ -75,10 +72,11 @@ def test_build_message_mention_replaces(monkeypatch):
     assert used_mention is True
 
 
-def test_build_message_mention_fallback_no_members(monkeypatch):
+def test_build_message_mention_fallback_no_members(monkeypatch, tmp_path):
+    monkeypatch.setattr(daily_quotes, "HUMAN_USERS_CACHE_FILE", tmp_path / "cache.json")
     monkeypatch.setattr(daily_quotes.random, "random", lambda: 0.01)
     monkeypatch.setattr(daily_quotes, "get_channel_guild_id", lambda *_: "guild1")
-    monkeypatch.setattr(daily_quotes, "fetch_guild_members", lambda *_: [])
+    monkeypatch.setattr(daily_quotes, "fetch_human_user_ids", lambda *_: [])
     quotes = ["Regular only"]
     mention_quotes = ["Hello {user}!"]
     message, used_mention = daily_quotes.build_message(
@@ -86,3 +84,71 @@ def test_build_message_mention_fallback_no_members(monkeypatch):
     )
     assert message == "Regular only"
     assert used_mention is False
+
+
+def test_fetch_human_user_ids_stops_after_max_pages(monkeypatch):
+    class FakeResponse:
+        status_code = 200
+        text = ""
+
+        def __init__(self, batch):
+            self._batch = batch
+
+        def json(self):
+            return self._batch
+
+    calls = []
+
+    def fake_get(url, headers=None, params=None, timeout=None):
+        calls.append(params)
+        start = len(calls) * 10
+        batch = [{"user": {"id": str(start + i), "bot": i == 0}} for i in range(2)]
+        return FakeResponse(batch)
+
+    monkeypatch.setattr(daily_quotes, "MEMBER_PAGE_LIMIT", 2)
+    monkeypatch.setattr(daily_quotes.SESSION, "get", fake_get)
+
+    user_ids = daily_quotes.fetch_human_user_ids("guild1", "token", max_pages=3)
+    assert user_ids == ["11", "21", "31"]
+    assert len(calls) == 3
+    assert calls[1]["after"] == "11"
+
+
+def test_build_message_mention_uses_fresh_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(daily_quotes, "HUMAN_USERS_CACHE_FILE", tmp_path / "cache.json")
+    daily_quotes.save_human_users_cache("123", ["7"])
+    monkeypatch.setattr(daily_quotes.random, "random", lambda: 0.01)
+
+    def fail(*_):
+        raise AssertionError("cache should avoid Discord API calls")
+
+    monkeypatch.setattr(daily_quotes, "get_channel_guild_id", fail)
+    monkeypatch.setattr(daily_quotes, "fetch_human_user_ids", fail)
+    message, used_mention = daily_quotes.build_message(
+        [], ["Hi {user}"], "123", "token"
+    )
+    assert message == "Hi <@7>"
+    assert used_mention is True
+
+
+def test_get_human_user_ids_reuses_cached_guild_id(monkeypatch, tmp_path):
+    monkeypatch.setattr(daily_quotes, "HUMAN_USERS_CACHE_FILE", tmp_path / "cache.json")
+    monkeypatch.setattr(daily_quotes, "HUMAN_USERS_CACHE_TTL", daily_quotes.timedelta(0))
+    daily_quotes.save_human_users_cache("123", ["7"], "guild1")
+
+    def fail(*_):
+        raise AssertionError("cached guild ID should skip the channel lookup")
+
+    monkeypatch.setattr(daily_quotes, "get_channel_guild_id", fail)
+    monkeypatch.setattr(daily_quotes, "fetch_human_user_ids", lambda guild_id, _: [guild_id])
+    assert daily_quotes.get_human_user_ids("123", "token") == ["guild1"]
+
+
+def test_load_human_users_cache_survives_several_daily_runs(monkeypatch, tmp_path):
+    monkeypatch.setattr(daily_quotes, "HUMAN_USERS_CACHE_FILE", tmp_path / "cache.json")
+    daily_quotes.save_human_users_cache("123", ["7"])
+    cache = daily_quotes._read_human_users_cache("123")
+    fetched_at = daily_quotes.datetime.fromisoformat(cache["fetched_at"])
+    cache["fetched_at"] = (fetched_at - daily_quotes.timedelta(days=3)).isoformat()
+    (tmp_path / "cache.json").write_text(daily_quotes.json.dumps(cache), encoding="utf-8")
+    assert daily_quotes.load_human_users_cache("123") == ["7"]
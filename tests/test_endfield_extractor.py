@@ -0,0 +1,67 @@
+import sys
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from extractors import endfield_extractor as endfield
+
+BASE = "https://game8.co/games/Arknights-Endfield/archives/535443"
+
+
+def _li(n, label, dates="Jan. 22 - Feb. 7, 2026"):
+    return f"<li><a href='/games/Arknights-Endfield/archives/{n}'>{label}</a> {dates}</li>"
+
+
+def _events(html):
+    return endfield.extract_endfield_events(BeautifulSoup(html, "html.parser"), BASE)
+
+
+def _gachas(html):
+    return endfield.extract_endfield_gachas(BeautifulSoup(html, "html.parser"), BASE)
+
+
+def test_wrapped_stop_header_ends_section():
+    tail = "<div><h2>Related Guides</h2></div>" + "<ul>" + _li(999, "Tier List") + "</ul>"
+    events = _events("<h2>Current Events</h2><ul>" + _li(1, "Event Alpha") + "</ul>" + tail)
+    gachas = _gachas("<h2>Current Banners</h2><ul>" + _li(2, "Laevatain Banner") + "</ul>" + tail)
+    assert any("Event Alpha" in b for b in events)
+    assert any("Laevatain Banner" in b for b in gachas)
+    assert not any("Tier List" in b for b in events + gachas)
+
+
+def test_stop_header_nested_in_scanned_block_ends_section():
+    html = (
+        "<h2>Current Events</h2>"
+        "<div><ul>" + _li(1, "Event Alpha") + "</ul><h3>Related Guides</h3></div>"
+        "<ul>" + _li(999, "Tier List") + "</ul>"
+    )
+    bullets = _events(html)
+    assert any("Event Alpha" in b for b in bullets)
+    assert not any("Tier List" in b for b in bullets)
+
+
+def test_section_list_outside_header_parent_is_reached():
+    html = "<div class='heading'><h2>Current Events</h2></div><ul>" + _li(1, "Event Alpha") + "</ul>"
+    assert any("Event Alpha" in b for b in _events(html))
+
+
+def test_label_variants_of_one_url_are_kept():
+    html = "<h2>Current Events</h2><ul>" + _li(1, "Event Alpha") + _li(1, "Event Alpha Rerun") + "</ul>"
+    bullets = _events(html)
+    assert sum("archives/1)" in b for b in bullets) == 2
+
+
+def test_cross_section_duplicates_listed_in_each_section():
+    html = (
+        "<h2>Current Events</h2><ul>" + _li(1, "Event Alpha") + "</ul>"
+        "<h2>Upcoming Events</h2><ul>" + _li(1, "Event Alpha") + _li(3, "Event Beta") + "</ul>"
+    )
+    bullets = _events(html)
+    assert bullets.index("__Current Events__") < bullets.index("__Upcoming Events__")
+    upcoming = bullets[bullets.index("__Upcoming Events__") + 1:]
+    assert any("Event Alpha" in b for b in upcoming)
+    assert any("Event Beta" in b for b in upcoming)
@@ -0,0 +1,68 @@
+import sys
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from extractors import hsr_extractor as hsr
+
+BASE = "https://game8.co/games/Honkai-Star-Rail/archives/408381"
+
+
+def _row(i, label=None):
+    link = f'<a href="/games/Honkai-Star-Rail/archives/{i}">{label}</a>' if label else "Rates"
+    return (
+        f"<tr><td><img src='{i}.png'><span>Slot {i}</span> {link}</td>"
+        f"<td><span>Sep. 23, 2025 - Oct. 15, 2025</span></td></tr>"
+    )
+
+
+def _collect(html):
+    soup = BeautifulSoup(html, "html.parser")
+    return hsr._collect_links_from_section(soup.find("h2"), BASE, hsr._NEXT_HINTS)
+
+
+def test_section_walk_not_cut_short_by_large_table():
+    # ~150 rows of nested td/img/span: well over 400 tags before the banner links
+    rows = "".join(_row(i) for i in range(150))
+    html = (
+        "<h2>Current Warp Banners</h2>"
+        f"<table>{rows}{_row(900, 'Evernight Banner')}</table>"
+        "<ul><li><a href='/games/Honkai-Star-Rail/archives/901'>Kafka Banner</a> 10/15/2025</li></ul>"
+        "<h2>Next Banners</h2>"
+        "<ul><li><a href='/games/Honkai-Star-Rail/archives/902'>Saber Banner</a></li></ul>"
+    )
+    items = _collect(html)
+    assert any("Evernight Banner" in it and "/archives/900" in it for it in items)
+    assert any("Kafka Banner" in it for it in items)
+    assert not any("Saber Banner" in it for it in items)
+
+
+def test_section_walk_keeps_more_than_twice_max_items_candidates():
+    # Many raw entries that collapse to the same normalized name must not crowd out later banners
+    dupes = "".join(
+        f"<p><a href='/games/Honkai-Star-Rail/archives/{i}'>Evernight Banner Schedule and Rates</a></p>"
+        for i in range(40)
+    )
+    html = (
+        "<h2>Current Warp Banners</h2>"
+        f"{dupes}<p><a href='/games/Honkai-Star-Rail/archives/950'>Kafka Banner</a></p>"
+        "<h2>Next Banners</h2>"
+    )
+    labels = "\n".join(_collect(html))
+    assert "Kafka Banner" in labels
+
+
+def test_section_walk_stops_at_stop_header_nested_in_block():
+    html = (
+        "<h2>Current Warp Banners</h2>"
+        "<div><p><a href='/games/Honkai-Star-Rail/archives/1'>Kafka Banner</a></p>"
+        "<h3>Next Banners</h3></div>"
+        "<p><a href='/games/Honkai-Star-Rail/archives/2'>Saber Banner</a></p>"
+    )
+    labels = "\n".join(_collect(html))
+    assert "Kafka Banner" in labels
+    assert "Saber Banner" not in labels
@@ -0,0 +1,47 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import mtga_codes_scraper as mtga
+
+
+def _item(i):
+    return {
+        "code": f"PLAYMTGARENA{i:03d}",
+        "category": "Booster Pack",
+        "reward": "3 Outlaws of Thunder Junction packs and a Bloomburrow cosmetic sleeve",
+        "expires": "December 31, 2026",
+    }
+
+
+def test_format_code_block_includes_category():
+    block = mtga.format_code_block(_item(1))
+    assert block.splitlines() == [
+        "**Category:** Booster Pack",
+        "`PLAYMTGARENA001`",
+        "**Reward:** 3 Outlaws of Thunder Junction packs and a Bloomburrow cosmetic sleeve",
+        "**Expires:** December 31, 2026",
+    ]
+
+
+def test_batched_messages_stay_under_discord_limit():
+    items = [_item(i) for i in range(60)]
+    chunks = mtga.chunk_new_items(items)
+    assert len(chunks) > 1
+    assert [it["code"] for chunk_items, _ in chunks for it in chunk_items] == [it["code"] for it in items]
+
+    mention = "<@&123456789012345678>"
+    for chunk_items, blocks in chunks:
+        content = mtga.format_new_codes_message(blocks, mention)
+        assert len(content) <= mtga.DISCORD_CONTENT_LIMIT
+        assert content.count("**Category:**") == len(chunk_items)
+
+
+def test_single_code_message_header():
+    _, blocks = mtga.chunk_new_items([_item(1)])[0]
+    content = mtga.format_new_codes_message(blocks, None)
+    assert content.startswith("**MTG Arena — New Code Found!**\n**Category:** Booster Pack\n")
+    assert content.endswith(f"<{mtga.PAGE_URL}>")